@@ -0,0 +1,59 @@
+"""
+365-day dose schedules for a large cohort.
+
+    python -m benchmarks.bench_adherence [users]
+
+Builds random medicine courses (1-6 per user, 3-30 days, 1-4 doses a day, starting
+within the last year or the next month) and times `dose_matrix` over all users at
+once, plus the per-user DoseSchedule path used by /analytics for comparison.
+"""
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+from utils.adherence import DoseSchedule, dose_matrix
+
+DAYS = 365
+
+
+def random_courses(n_users: int, today: date, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    per_user = rng.integers(1, 7, n_users)
+    user_index = np.repeat(np.arange(n_users), per_user)
+    n = len(user_index)
+    starts = today.toordinal() + rng.integers(-365, 30, n)
+    ends = starts + rng.integers(3, 31, n)
+    daily = rng.integers(1, 5, n)
+    return user_index, starts, ends, daily
+
+
+def main(n_users: int):
+    today = date.today()
+    user_index, starts, ends, daily = random_courses(n_users, today)
+    print(f"{n_users} users, {len(user_index)} courses, {DAYS} days")
+
+    t = time.perf_counter()
+    matrix = dose_matrix(user_index, starts, ends, daily, n_users, today, DAYS)
+    elapsed = time.perf_counter() - t
+    print(f"dose_matrix (all users)        {elapsed:8.3f} s   {matrix.nbytes / 1e6:.0f} MB")
+
+    # Per-user path, timed on a sample and scaled up
+    sample = min(n_users, 2_000)
+    bounds = np.searchsorted(user_index, np.arange(sample + 1))
+    t = time.perf_counter()
+    for u in range(sample):
+        schedule = DoseSchedule()
+        lo, hi = bounds[u], bounds[u + 1]
+        schedule.starts = starts[lo:hi].astype(np.int32)
+        schedule.ends = ends[lo:hi].astype(np.int32)
+        schedule.daily = daily[lo:hi].astype(np.int16)
+        row = schedule.daily_doses(today, DAYS)
+        assert (row == matrix[u]).all()
+    per_user = (time.perf_counter() - t) / sample
+    print(f"DoseSchedule.daily_doses       {per_user * 1e6:8.1f} us/user  (~{per_user * n_users:.1f} s for all)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
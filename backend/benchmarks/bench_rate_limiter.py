@@ -0,0 +1,48 @@
+"""
+Per-check overhead of the rate limiter.
+
+    python -m benchmarks.bench_rate_limiter
+
+Times GCRALimiter.hit against the in-memory store (the per-request hot path) and the
+SQLite store used to share limits between workers.
+"""
+import os
+import tempfile
+import timeit
+
+from utils.rate_limiter import DailyQuota, GCRALimiter, MemoryStore, SQLiteStore
+
+
+def per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=7)) / number * 1e6
+
+
+def main():
+    memory = GCRALimiter(MemoryStore(), 10**9, 60)
+    many_keys = GCRALimiter(MemoryStore(), 10**9, 60)
+    keys = [f"user:{i}" for i in range(50_000)]
+    it = iter(keys * 1000)
+    quota = DailyQuota(MemoryStore(), {"free": 10**9})
+    # Store at its key cap, every check a new key (e.g. rotating IPv6 addresses)
+    full = GCRALimiter(MemoryStore(max_keys=100_000), 30, 60)
+    for i in range(100_000):
+        full.hit(f"ip:old:{i}")
+    fresh = (f"ip:new:{i}" for i in range(10**7))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = GCRALimiter(SQLiteStore(os.path.join(tmp, "limits.db")), 10**9, 60)
+        rows = [
+            ("GCRA, memory store, one key", per_call_us(lambda: memory.hit("user:abc"), 200_000)),
+            ("GCRA, memory store, 50k keys", per_call_us(lambda: many_keys.hit(next(it)), 200_000)),
+            ("GCRA, memory store, full, new keys", per_call_us(lambda: full.hit(next(fresh)), 200_000)),
+            ("daily quota, memory store", per_call_us(lambda: quota.hit("user:abc", "free"), 100_000)),
+            ("GCRA, sqlite store", per_call_us(lambda: sqlite.hit("user:abc"), 2_000)),
+        ]
+
+    for name, us in rows:
+        print(f"{name:<36}{us:>10.2f} us/check")
+    print(f"full store size after the run: {len(full.store._tats)} keys (cap 100000)")
+
+
+if __name__ == "__main__":
+    main()
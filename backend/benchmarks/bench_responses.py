@@ -0,0 +1,100 @@
+"""
+Serialization time and bytes on the wire for GET /prescriptions, for a user with
+500 prescriptions (5 medicines each).
+
+    python -m benchmarks.bench_responses [n_prescriptions]
+
+Encoders: FastAPI's default (jsonable_encoder + json) vs orjson. Wire sizes and
+per-request times go through the app's compression middleware (utils/compression.py)
+with each Accept-Encoding a client may send.
+"""
+import json
+import sys
+import time
+import timeit
+import uuid
+
+import orjson
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+
+from utils.compression import add_compression
+
+
+def make_rows(n: int, medicines_per_prescription: int = 5) -> list:
+    rows = []
+    for i in range(n):
+        pid = str(uuid.uuid4())
+        rows.append({
+            "id": pid,
+            "user_id": "9fa85f64-5717-4562-b3fc-2c963f66afa6",
+            "image_url": f"https://example.supabase.co/storage/v1/object/public/prescriptions/u/{pid}.jpg",
+            "thumbnail_url": None,
+            "medium_url": None,
+            "created_at": "2026-01-01T10:00:00.123456+00:00",
+            "updated_at": "2026-01-01T10:00:00.123456+00:00",
+            "doctor_name": f"Dr Example {i % 40}",
+            "patient_name": "Patient",
+            "notes": "Uploaded via app",
+            "medicines": [
+                {
+                    "id": str(uuid.uuid4()),
+                    "prescription_id": pid,
+                    "created_at": "2026-01-01T10:00:00.123456+00:00",
+                    "name": f"Medicine {j}",
+                    "type": "tablet",
+                    "dosage_pattern": "1-0-1",
+                    "instructions": "After food",
+                    "total_quantity": 10,
+                    "duration_days": 5,
+                    "purpose": "A proton pump inhibitor used to reduce stomach acid and treat heartburn and ulcers.",
+                }
+                for j in range(medicines_per_prescription)
+            ],
+        })
+    return rows
+
+
+def per_call_ms(fn, number: int = 5) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rows = make_rows(n)
+    print(f"{n} prescriptions x 5 medicines")
+
+    print(f"\n{'encoder':<32}{'ms/call':>10}{'bytes':>12}")
+    encoders = {
+        "jsonable_encoder + json.dumps": lambda: json.dumps(jsonable_encoder(rows)).encode(),
+        "orjson": lambda: orjson.dumps(rows),
+    }
+    for name, fn in encoders.items():
+        print(f"{name:<32}{per_call_ms(fn):>10.2f}{len(fn()):>12}")
+
+    app = FastAPI()
+
+    @app.get("/prescriptions")
+    def prescriptions():
+        return ORJSONResponse(rows)
+
+    add_compression(app)
+    client = TestClient(app)
+
+    print(f"\n{'Accept-Encoding':<32}{'ms/request':>10}{'wire bytes':>12}  content-encoding")
+    for accept in ("identity", "gzip", "br"):
+        headers = {"Accept-Encoding": accept}
+        timings = []
+        for _ in range(10):
+            start = time.perf_counter()
+            with client.stream("GET", "/prescriptions", headers=headers) as response:
+                wire = sum(len(chunk) for chunk in response.iter_raw())
+            timings.append(time.perf_counter() - start)
+        encoding = response.headers.get("content-encoding", "-")
+        print(f"{accept:<32}{min(timings) * 1000:>10.2f}{wire:>12}  {encoding}")
+
+
+if __name__ == "__main__":
+    main()
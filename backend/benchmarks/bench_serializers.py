@@ -0,0 +1,41 @@
+"""
+Serialization cost of GET /prescriptions for a user with many prescriptions.
+
+    python -m benchmarks.bench_serializers [n_prescriptions]
+
+Compares FastAPI's default path (jsonable_encoder + json), plain orjson on the raw
+rows, and the two models/serializers.py paths: TypeAdapter validation (tests/dev)
+and column-trimmed orjson (production default).
+"""
+import gzip
+import json
+import sys
+import timeit
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.bench_responses import make_rows
+from models.serializers import prescriptions_response
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rows = make_rows(n)
+    cases = {
+        "jsonable_encoder + json.dumps": lambda: json.dumps(jsonable_encoder(rows)).encode(),
+        "orjson (raw rows)": lambda: orjson.dumps(rows),
+        "TypeAdapter validate + dump_json": lambda: prescriptions_response(rows, validate=True).body,
+        "trimmed columns + orjson": lambda: prescriptions_response(rows, validate=False).body,
+    }
+    print(f"{n} prescriptions x 5 medicines")
+    print(f"{'path':<36}{'ms/call':>10}{'bytes':>12}{'gzip bytes':>12}")
+    for name, fn in cases.items():
+        number = 5
+        seconds = min(timeit.repeat(fn, number=number, repeat=3)) / number
+        body = fn()
+        print(f"{name:<36}{seconds * 1000:>10.2f}{len(body):>12}{len(gzip.compress(body, 6)):>12}")
+
+
+if __name__ == "__main__":
+    main()
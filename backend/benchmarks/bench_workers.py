@@ -0,0 +1,111 @@
+"""
+Throughput of the production launcher (server.py) as the worker count grows.
+
+    python -m benchmarks.bench_workers [workers ...]     # default: 1 2 4
+
+For each worker count, starts `server.run` in a subprocess serving the small app below,
+then drives it with concurrent keep-alive clients for a few seconds. The endpoint does
+CPU-bound, GIL-holding work (building and querying a search index, as the /search
+fallback does) so a single worker cannot use more than one core. Scaling is capped by
+the cores available to this machine, which the load generator shares.
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from utils.search_index import PrescriptionSearchIndex
+
+PORT = int(os.environ.get("BENCH_PORT", 8765))
+DURATION = float(os.environ.get("BENCH_DURATION", 5))
+CLIENTS = int(os.environ.get("BENCH_CLIENTS", 32))
+
+ROWS = [
+    {
+        "id": str(i),
+        "created_at": "2026-01-01T00:00:00Z",
+        "doctor_name": f"Dr. Doctor{i % 40}",
+        "medicines": [
+            {"name": f"Medicine{(i * 7 + j) % 300}", "purpose": "antibiotic for infection", "instructions": "after food"}
+            for j in range(3)
+        ],
+    }
+    for i in range(200)
+]
+
+app = FastAPI()
+
+
+@app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+@app.get("/work")
+async def work():
+    # Deliberately on the event loop: the point is to occupy this worker's core
+    return PrescriptionSearchIndex(ROWS).search("medicin antibiotc", limit=5)
+
+
+def wait_until_up(timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{PORT}/ping", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def drive() -> float:
+    """
+    Requests per second completed by CLIENTS threads over DURATION seconds.
+    """
+    counts = [0] * CLIENTS
+    stop = time.monotonic() + DURATION
+
+    def client(i):
+        with httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=30) as http:
+            while time.monotonic() < stop:
+                http.get("/work").raise_for_status()
+                counts[i] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENTS)]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / (time.monotonic() - start)
+
+
+def main(worker_counts):
+    from server import available_cpus
+    print(f"{available_cpus()} CPU(s) available, {CLIENTS} clients, {DURATION:g}s per run")
+
+    base = None
+    for workers in worker_counts:
+        env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(PORT), HOST="127.0.0.1",
+                   RATE_LIMIT_STORE="", LOG_LEVEL="WARNING", LIMIT_CONCURRENCY="1000")
+        proc = subprocess.Popen(
+            [sys.executable, "-c", "from server import run; run('benchmarks.bench_workers:app')"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_until_up()
+            rps = drive()
+        finally:
+            proc.terminate()
+            proc.wait(timeout=60)
+        base = base or rps
+        print(f"{workers:>3} worker(s) {rps:10.0f} req/s   x{rps / base:.2f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1, 2, 4])
@@ -1,11 +1,14 @@
 import google.generativeai as genai
 import os
 import json
+import logging
 import typing_extensions as typing
 from utils.dosage_calculator import calculate_duration
+from utils.lifecycle import gemini_calls
 
 # Configure Gemini
 genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+logger = logging.getLogger(__name__)
 
 # --- 1. Define Schema with "Descriptive" Field Names ---
 # We use 'medical_explanation' instead of 'purpose' here to force the AI to write sentences.
@@ -51,10 +54,12 @@ def extract_medicine_info(image_bytes: bytes) -> dict:
     Sends prescription image to Gemini with strict schema enforcement.
     """
     try:
-        response = model.generate_content([
-            {"mime_type": "image/jpeg", "data": image_bytes},
-            SYSTEM_PROMPT
-        ])
+        # Tracked so a shutting-down worker can wait for the call to finish
+        with gemini_calls.track():
+            response = model.generate_content([
+                {"mime_type": "image/jpeg", "data": image_bytes},
+                SYSTEM_PROMPT
+            ])
         
         data = json.loads(response.text)
         medicines = data.get("medicines", [])
@@ -81,7 +86,7 @@ def extract_medicine_info(image_bytes: bytes) -> dict:
         return data
 
     except Exception as e:
-        print(f"Gemini Analysis Failed: {e}")
+        logger.error(f"Gemini Analysis Failed: {e}")
         return {"medicines": [], "doctor_name": "Unknown", "patient_name": "Unknown"}
 
 # --- Verification Feature (Kept Same) ---
@@ -127,13 +132,14 @@ def verify_medicine_match(image_bytes: bytes, prescribed_medicines: list) -> dic
         med_list_str = "\\n".join([f"- {m['name']} (Purpose: {m.get('purpose', 'Unknown')})" for m in prescribed_medicines])
         prompt = VERIFY_PROMPT.format(prescription_list=med_list_str)
         
-        response = model_verify.generate_content([
-            {"mime_type": "image/jpeg", "data": image_bytes},
-            prompt
-        ])
+        with gemini_calls.track():
+            response = model_verify.generate_content([
+                {"mime_type": "image/jpeg", "data": image_bytes},
+                prompt
+            ])
         return json.loads(response.text)
     except Exception as e:
-        print(f"Gemini Verification Failed: {e}")
+        logger.error(f"Gemini Verification Failed: {e}")
         return {
             "status": "error",
             "identified_medicine_name": "Unknown",
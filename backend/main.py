@@ -1,19 +1,37 @@
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from routes import upload_prescription, medicines, reminders, auth, verify_medicine
-import uvicorn
+from fastapi.responses import ORJSONResponse
+from routes import upload_prescription, medicines, reminders, auth, verify_medicine, analytics, search
+from utils.access_log import AccessLogMiddleware, setup_logging
+from utils.compression import add_compression
+from utils.lifecycle import gemini_calls, install_drain_hook, lifecycle
+from supabase_client import get_supabase_client
+import asyncio
+import logging
 import os
 
-app = FastAPI(title="Medi-Scribe Backend")
+setup_logging()
+# Fail /readyz as soon as SIGTERM arrives, before uvicorn stops accepting connections
+install_drain_hook()
 
-# 1. Logging Middleware (Helps debug requests on Render)
-@app.middleware("http")
-async def log_requests(request, call_next):
-    print(f"Incoming Request: {request.method} {request.url}")
-    response = await call_next(request)
-    return response
+# Max seconds the readiness probe waits for Supabase
+READINESS_TIMEOUT = float(os.environ.get("READINESS_TIMEOUT", 2))
 
-# 2. CORS Configuration (CRITICAL for Deployment)
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="Medi-Scribe Backend", default_response_class=ORJSONResponse)
+
+# 1. Access Log Middleware (Helps debug requests on Render)
+# Pure ASGI + queue-backed logging. Sampling and excluded paths are configured via
+# ACCESS_LOG_SAMPLE_RATE / ACCESS_LOG_EXCLUDE_PATHS (health checks on "/" are skipped by default).
+app.add_middleware(AccessLogMiddleware)
+
+# 2. Response Compression
+# Brotli/gzip above COMPRESSION_MIN_SIZE, see utils/compression.py
+add_compression(app)
+
+# 3. CORS Configuration (CRITICAL for Deployment)
 # We use ["*"] to allow ALL origins. This is the safest way to ensure 
 # Vercel can talk to Render without "Network Error" issues.
 app.add_middleware(
@@ -24,19 +42,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 3. Register Routes
+# 4. Register Routes
 app.include_router(auth.router)
 app.include_router(upload_prescription.router)
 app.include_router(medicines.router)
 app.include_router(reminders.router)
 app.include_router(verify_medicine.router)
+app.include_router(analytics.router)
+app.include_router(search.router)
 
 @app.get("/")
 def read_root():
     return {"message": "Medi-Scribe API is running"}
 
+# 5. Health Probes
+@app.get("/healthz")
+async def liveness():
+    # Served on the event loop: answering at all means the worker is not wedged
+    return {"status": "ok", "in_flight_gemini_calls": gemini_calls.count}
+
+@app.get("/readyz")
+async def readiness():
+    if lifecycle.draining:
+        return ORJSONResponse({"status": "draining"}, status_code=503)
+    try:
+        # Cheap query through the shared Supabase client (and its HTTP connection pool)
+        query = get_supabase_client().table("profiles").select("id").limit(1)
+        await asyncio.wait_for(run_in_threadpool(query.execute), READINESS_TIMEOUT)
+    except Exception as e:
+        # Probes are unauthenticated: keep error details in the log
+        logger.warning(f"Readiness check failed: {e!r}")
+        return ORJSONResponse({"status": "unavailable", "detail": "database unreachable"}, status_code=503)
+    return {"status": "ready", "in_flight_gemini_calls": gemini_calls.count}
+
 if __name__ == "__main__":
-    # Get port from environment variable or default to 8000
-    port = int(os.environ.get("PORT", 8000))
-    # reload=False for production stability
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=False)
\ No newline at end of file
+    # Production launcher (workers, uvloop/httptools, graceful shutdown), see server.py
+    from server import run
+    run()
@@ -4,7 +4,8 @@ from uuid import UUID
 from datetime import datetime
 
 class MedicineBase(BaseModel):
-    name: str
+    # Nullable in the DB: Gemini can return a medicine without a readable name
+    name: Optional[str] = None
     type: Optional[str] = "tablet"
     dosage_pattern: Optional[str] = None
     instructions: Optional[str] = None
@@ -18,7 +19,7 @@ class MedicineCreate(MedicineBase):
 class MedicineResponse(MedicineBase):
     id: UUID
     prescription_id: UUID
-    created_at: datetime
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -16,9 +16,11 @@ class PrescriptionCreate(PrescriptionBase):
 class PrescriptionResponse(PrescriptionBase):
     id: UUID
     user_id: UUID
-    image_url: str
-    created_at: datetime
-    updated_at: datetime
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
     medicines: List[MedicineResponse] = []
 
     class Config:
@@ -0,0 +1,66 @@
+from fastapi import Response
+from pydantic import TypeAdapter
+from typing import List
+import orjson
+import os
+
+from .medicine_models import MedicineResponse
+from .prescription_models import PrescriptionResponse
+
+# Validate DB rows against the response models before sending them.
+# Off by default: production trusts Supabase rows and serializes them with orjson.
+# The test suite turns it on, so a row that no longer matches its model
+# (model/schema drift) raises ValidationError instead of being sent.
+VALIDATE_RESPONSES = os.environ.get("VALIDATE_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+# Adapters are compiled once at import time, not per request.
+medicine_list_adapter = TypeAdapter(List[MedicineResponse])
+prescription_adapter = TypeAdapter(PrescriptionResponse)
+prescription_list_adapter = TypeAdapter(List[PrescriptionResponse])
+
+
+# Columns sent by the unvalidated path: the response model's fields
+MEDICINE_COLUMNS = frozenset(MedicineResponse.model_fields)
+PRESCRIPTION_COLUMNS = frozenset(PrescriptionResponse.model_fields)
+
+
+def trim_medicine(row: dict) -> dict:
+    """
+    Drop columns the response model does not declare (e.g. `search_tsv`).
+    Rows without extra columns are returned as they are.
+    """
+    if row.keys() <= MEDICINE_COLUMNS:
+        return row
+    return {k: v for k, v in row.items() if k in MEDICINE_COLUMNS}
+
+
+def trim_prescription(row: dict) -> dict:
+    medicines = row.get("medicines") or ()
+    if row.keys() <= PRESCRIPTION_COLUMNS and all(m.keys() <= MEDICINE_COLUMNS for m in medicines):
+        return row
+    data = {k: v for k, v in row.items() if k in PRESCRIPTION_COLUMNS}
+    if "medicines" in data:
+        data["medicines"] = [trim_medicine(m) for m in medicines]
+    return data
+
+
+def _json_response(content: bytes) -> Response:
+    return Response(content=content, media_type="application/json")
+
+
+def medicines_response(rows: list, validate: bool = VALIDATE_RESPONSES) -> Response:
+    if validate:
+        return _json_response(medicine_list_adapter.dump_json(medicine_list_adapter.validate_python(rows)))
+    return _json_response(orjson.dumps([trim_medicine(r) for r in rows]))
+
+
+def prescription_response(row: dict, validate: bool = VALIDATE_RESPONSES) -> Response:
+    if validate:
+        return _json_response(prescription_adapter.dump_json(prescription_adapter.validate_python(row)))
+    return _json_response(orjson.dumps(trim_prescription(row)))
+
+
+def prescriptions_response(rows: list, validate: bool = VALIDATE_RESPONSES) -> Response:
+    if validate:
+        return _json_response(prescription_list_adapter.dump_json(prescription_list_adapter.validate_python(rows)))
+    return _json_response(orjson.dumps([trim_prescription(r) for r in rows]))
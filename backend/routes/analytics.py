@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date
+from supabase_client import get_supabase_client, get_authenticated_client
+from .auth import get_current_user, get_token
+from utils.adherence import dose_schedules
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+supabase = get_supabase_client()
+
+def load_schedule(client, user_id: str):
+    def loader():
+        res = client.table("prescriptions").select(
+            "id, created_at, medicines(name, dosage_pattern, duration_days, total_quantity)"
+        ).eq("user_id", user_id).execute()
+        return res.data
+    return dose_schedules.get(user_id, loader)
+
+@router.get("/summary")
+async def get_dosage_summary(
+    days: int = Query(30, ge=1, le=365),
+    ending_within: int = Query(3, ge=1, le=90),
+    user_id: str = Depends(get_current_user),
+    token: str = Depends(get_token)
+):
+    try:
+        client = get_authenticated_client(token)
+        schedule = load_schedule(client, user_id)
+        summary = schedule.summary(date.today(), days, ending_within)
+
+        reminders = client.table("reminders").select("id", count="exact").eq("user_id", user_id).eq("is_active", True).execute()
+        summary["active_reminders"] = reminders.count or 0
+        return summary
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/schedule")
+async def get_dose_schedule(
+    days: int = Query(30, ge=1, le=365),
+    user_id: str = Depends(get_current_user),
+    token: str = Depends(get_token)
+):
+    """
+    Per-medicine doses for each of the next `days` days (rows follow `medicines`).
+    """
+    try:
+        client = get_authenticated_client(token)
+        schedule = load_schedule(client, user_id)
+        today = date.today()
+        matrix = schedule.medicine_matrix(today, days)
+        active = matrix.any(axis=1)
+        return {
+            "window_start": today.isoformat(),
+            "days": days,
+            "medicines": [
+                {"name": name, "prescription_id": pid}
+                for name, pid in zip(schedule.names[active], schedule.prescription_ids[active])
+            ],
+            "doses": matrix[active].tolist(),
+            "doses_per_day": matrix.sum(axis=0).tolist(),
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
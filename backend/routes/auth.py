@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Security
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 import uuid
@@ -9,6 +10,7 @@ from google.auth.transport import requests as google_requests
 
 from supabase_client import get_supabase_client
 from utils.security import hash_password, verify_password, create_access_token, decode_access_token
+from utils.rate_limiter import user_limiter, ip_limiter, daily_quota, client_ip, rate_limit_headers
 #from utils.smtp_verifier import verify_email_smtp
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -33,7 +35,7 @@ class GoogleLogin(BaseModel):
 def get_token(credentials: HTTPAuthorizationCredentials = Security(security)):
     return credentials.credentials
 
-def get_current_user(token: str = Depends(get_token)):
+def get_token_payload(token: str = Depends(get_token)) -> dict:
     payload = decode_access_token(token)
     if not payload:
         raise HTTPException(
@@ -41,8 +43,34 @@ def get_current_user(token: str = Depends(get_token)):
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return payload
+
+def get_current_user(payload: dict = Depends(get_token_payload)):
     return payload.get("sub")
 
+def model_rate_limit(request: Request, response: Response, payload: dict = Depends(get_token_payload)):
+    """
+    Throttles the endpoints that trigger (paid, slow) Gemini calls.
+    Checks the per-IP and per-user windows, then the user's daily plan quota.
+    """
+    user_id = payload.get("sub")
+    peer = request.client.host if request.client else None
+    ip = client_ip(peer, request.headers.get("x-forwarded-for"))
+
+    ip_result = ip_limiter.hit(f"ip:{ip}")
+    if not ip_result[0]:
+        raise HTTPException(status_code=429, detail="Too many requests. Please slow down.", headers=rate_limit_headers(ip_result))
+
+    user_result = user_limiter.hit(f"user:{user_id}")
+    if not user_result[0]:
+        raise HTTPException(status_code=429, detail="Too many requests. Please slow down.", headers=rate_limit_headers(user_result))
+
+    quota = daily_quota.hit(user_id, payload.get("plan"))
+    if not quota[0]:
+        raise HTTPException(status_code=429, detail="Daily limit reached for your plan.", headers=rate_limit_headers(quota))
+
+    response.headers.update(rate_limit_headers(user_result))
+
 # --- Routes ---
 
 @router.post("/register")
@@ -51,16 +79,13 @@ async def register(user: UserRegister):
     #if not verify_email_smtp(user.email):
         # raise HTTPException(status_code=400, detail="Email address does not exist or is undeliverable.")
 
-    # 2. Check if user exists
-    # We use the Service Role (or Anon if RLS allows) client. Backend should ideally have Service Role.
-    # Assuming supabase client works for SELECT.
-    res = supabase.table("profiles").select("*").eq("email", user.email).execute()
-    if res.data:
-        raise HTTPException(status_code=400, detail="User with this email already exists.")
-
-    # 3. Create User
+    # 2. Create User (atomic)
+    # A single INSERT ... ON CONFLICT (email) DO NOTHING replaces the old
+    # select-then-insert pair. The unique email index decides the race, and an
+    # empty result means the email was already taken.
     new_id = str(uuid.uuid4())
-    hashed = hash_password(user.password)
+    # bcrypt is deliberately slow; keep it off the event loop
+    hashed = await run_in_threadpool(hash_password, user.password)
     
     user_data = {
         "id": new_id,
@@ -70,12 +95,15 @@ async def register(user: UserRegister):
         "created_at": "now()"
     }
     
-    insert_res = supabase.table("profiles").insert(user_data).execute()
+    try:
+        insert_res = supabase.table("profiles").upsert(user_data, on_conflict="email", ignore_duplicates=True).execute()
+    except Exception as insert_err:
+        raise HTTPException(status_code=500, detail=f"Failed to register user: {str(insert_err)}")
     if not insert_res.data:
-        raise HTTPException(status_code=500, detail="Failed to register user.")
+        raise HTTPException(status_code=400, detail="User with this email already exists.")
 
-    # 4. Issue Token
-    access_token = create_access_token(data={"sub": new_id, "email": user.email})
+    # 3. Issue Token
+    access_token = create_access_token(data={"sub": new_id, "email": user.email, "plan": "free"})
     return {"access_token": access_token, "token_type": "bearer", "user": {"id": new_id, "email": user.email, "name": user.full_name}}
 
 @router.post("/login")
@@ -88,11 +116,11 @@ async def login(user: UserLogin):
     db_user = res.data[0]
     
     # 2. Verify Password
-    if not db_user.get("password_hash") or not verify_password(user.password, db_user["password_hash"]):
+    if not db_user.get("password_hash") or not await run_in_threadpool(verify_password, user.password, db_user["password_hash"]):
          raise HTTPException(status_code=400, detail="Invalid email or password.")
          
     # 3. Issue Token
-    access_token = create_access_token(data={"sub": db_user["id"], "email": db_user["email"]})
+    access_token = create_access_token(data={"sub": db_user["id"], "email": db_user["email"], "plan": db_user.get("plan") or "free"})
     return {"access_token": access_token, "token_type": "bearer", "user": {"id": db_user["id"], "email": db_user["email"], "name": db_user["full_name"]}}
 
 @router.post("/google")
@@ -106,44 +134,35 @@ async def google_login(login_data: GoogleLogin):
         name = id_info.get("name")
         picture = id_info.get("picture")
         
-        # 2. Check/Create User
-        res = supabase.table("profiles").select("*").eq("email", email).execute()
-        
-        if res.data:
-            # Login existing
-            db_user = res.data[0]
-            # Optional: Update google_sub or avatar if missing
-            updates = {}
-            if not db_user.get("google_sub"): updates["google_sub"] = google_sub
-            if not db_user.get("avatar_url"): updates["avatar_url"] = picture
-            if updates:
-                supabase.table("profiles").update(updates).eq("id", db_user["id"]).execute()
-            
-            user_id = db_user["id"]
-            user_name = db_user["full_name"]
-            
-        else:
-            # Register new Google User
-            user_id = str(uuid.uuid4())
-            user_name = name
-            user_data = {
-                "id": user_id,
-                "email": email,
-                "full_name": name,
-                "google_sub": google_sub,
-                "avatar_url": picture,
-                "created_at": "now()"
-            }
-            try:
-                supabase.table("profiles").insert(user_data).execute()
-            except Exception as insert_err:
-                # Fallback if DB insert fails (e.g. duplicate UUID almost impossible, but generic error)
-                raise HTTPException(status_code=500, detail=f"Failed to create Google user: {str(insert_err)}")
+        # 2. Check/Create User (single round-trip)
+        # `upsert_google_profile` (see supabase_migration.sql) inserts the profile or,
+        # on an email conflict, only fills google_sub/avatar_url if they are missing.
+        # It returns the resulting row, so concurrent first logins converge on one profile.
+        try:
+            res = supabase.rpc("upsert_google_profile", {
+                "p_id": str(uuid.uuid4()),
+                "p_email": email,
+                "p_full_name": name,
+                "p_google_sub": google_sub,
+                "p_avatar_url": picture
+            }).execute()
+        except Exception as upsert_err:
+            raise HTTPException(status_code=500, detail=f"Failed to create Google user: {str(upsert_err)}")
+
+        rows = res.data if isinstance(res.data, list) else [res.data]
+        if not rows or not rows[0]:
+            raise HTTPException(status_code=500, detail="Failed to create Google user.")
+
+        db_user = rows[0]
+        user_id = db_user["id"]
+        user_name = db_user.get("full_name") or name
             
         # 3. Issue Token
-        access_token = create_access_token(data={"sub": user_id, "email": email})
+        access_token = create_access_token(data={"sub": user_id, "email": email, "plan": db_user.get("plan") or "free"})
         return {"access_token": access_token, "token_type": "bearer", "user": {"id": user_id, "email": email, "name": user_name, "avatar": picture}}
 
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid Google Token")
     except Exception as e:
@@ -1,21 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from typing import List
 from supabase_client import get_supabase_client, get_authenticated_client
 from .auth import get_current_user, get_token
+from models.medicine_models import MedicineResponse
+from models.prescription_models import PrescriptionResponse
+from utils.image_variants import backfill_candidates, backfill_variants
+from utils.adherence import dose_schedules
+from utils.search_index import search_indexes
+from models.serializers import medicines_response, prescription_response, prescriptions_response
 
 router = APIRouter()
 supabase = get_supabase_client()
 
-@router.get("/prescriptions")
-async def get_prescriptions(user_id: str = Depends(get_current_user), token: str = Depends(get_token)):
+# Max prescriptions whose image variants are backfilled per list request
+VARIANT_BACKFILL_BATCH = 5
+
+@router.get("/prescriptions", response_model=List[PrescriptionResponse])
+async def get_prescriptions(background_tasks: BackgroundTasks, user_id: str = Depends(get_current_user), token: str = Depends(get_token)):
     try:
         client = get_authenticated_client(token)
         # Filter by user_id manually as we are using service role client usually
         res = client.table("prescriptions").select("*, medicines(*)").eq("user_id", user_id).order("created_at", desc=True).execute()
-        return res.data
+        # Older uploads have no thumbnails yet: generate a few after responding,
+        # so the next dashboard load gets the small images.
+        missing = backfill_candidates(res.data, VARIANT_BACKFILL_BATCH)
+        if missing:
+            background_tasks.add_task(backfill_variants, client, missing)
+        # Rows go straight to orjson (trimmed to the response model's columns) instead of
+        # FastAPI's response_model + jsonable_encoder pass; validated when
+        # VALIDATE_RESPONSES is on (see models/serializers.py).
+        return prescriptions_response(res.data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/prescriptions/{id}")
+@router.get("/prescriptions/{id}", response_model=PrescriptionResponse)
 async def get_prescription(id: str, user_id: str = Depends(get_current_user), token: str = Depends(get_token)):
     try:
         client = get_authenticated_client(token)
@@ -31,7 +49,7 @@ async def get_prescription(id: str, user_id: str = Depends(get_current_user), to
         
         # Combine
         prescription["medicines"] = meds.data
-        return prescription
+        return prescription_response(prescription)
     except HTTPException:
         raise
     except Exception as e:
@@ -50,13 +68,15 @@ async def delete_prescription(id: str, user_id: str = Depends(get_current_user),
         # Assuming cascade delete is ON in Postgres or we delete medicines first
         client.table("medicines").delete().eq("prescription_id", id).execute()
         del_res = client.table("prescriptions").delete().eq("id", id).eq("user_id", user_id).execute()
+        dose_schedules.remove_prescription(user_id, id)
+        search_indexes.invalidate(user_id)
         
         return {"message": "Prescription deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/prescriptions/{id}/medicines")
+@router.get("/prescriptions/{id}/medicines", response_model=List[MedicineResponse])
 async def get_prescription_medicines(id: str, user_id: str = Depends(get_current_user), token: str = Depends(get_token)):
     try:
         client = get_authenticated_client(token)
@@ -66,7 +86,7 @@ async def get_prescription_medicines(id: str, user_id: str = Depends(get_current
             raise HTTPException(status_code=404, detail="Prescription not found or unauthorized")
             
         res = client.table("medicines").select("*").eq("prescription_id", id).execute()
-        return res.data
+        return medicines_response(res.data)
     except HTTPException:
         raise
     except Exception as e:
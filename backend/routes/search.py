@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from typing import Optional
+from postgrest.exceptions import APIError
+import logging
+import time
+from supabase_client import get_supabase_client, get_authenticated_client
+from .auth import get_current_user, get_token
+from utils.search_index import search_indexes
+
+router = APIRouter(tags=["Search"])
+supabase = get_supabase_client()
+logger = logging.getLogger(__name__)
+
+# PostgREST's "function not found" error code
+FUNCTION_NOT_FOUND = "PGRST202"
+# Once the `search_prescriptions` function is found missing, use the in-process index
+# for this long before asking the database again (e.g. after the migration is applied).
+RPC_RECHECK_INTERVAL = 300
+_rpc_missing_until = 0.0
+
+@router.get("/search")
+async def search_prescriptions(
+    q: str = Query(..., min_length=1, max_length=200),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    user_id: str = Depends(get_current_user),
+    token: str = Depends(get_token)
+):
+    """
+    Ranked prefix/fuzzy search over medicine name, purpose, instructions and doctor name.
+    Uses the `search_prescriptions` Postgres function, or an in-process index if it is not installed.
+    """
+    global _rpc_missing_until
+    client = get_authenticated_client(token)
+    if time.monotonic() >= _rpc_missing_until:
+        try:
+            res = client.rpc("search_prescriptions", {
+                "p_user_id": user_id,
+                "p_query": q,
+                "p_from": date_from.isoformat() if date_from else None,
+                "p_to": date_to.isoformat() if date_to else None,
+                "p_limit": limit,
+                "p_offset": offset
+            }).execute()
+            found = res.data or {}
+            return {"query": q, "total": found.get("total", 0), "limit": limit, "offset": offset, "results": found.get("results", [])}
+        except APIError as e:
+            if e.code != FUNCTION_NOT_FOUND:
+                raise HTTPException(status_code=500, detail=str(e))
+            logger.warning(f"search_prescriptions function not installed, using in-process index for {RPC_RECHECK_INTERVAL}s")
+            _rpc_missing_until = time.monotonic() + RPC_RECHECK_INTERVAL
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        def loader():
+            res = client.table("prescriptions").select("*, medicines(name, purpose, instructions)").eq("user_id", user_id).execute()
+            return res.data
+        index = search_indexes.get(user_id, loader)
+        found = index.search(q, date_from, date_to, limit, offset)
+        return {"query": q, "total": found["total"], "limit": limit, "offset": offset, "results": found["results"]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,18 +1,23 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from typing import List
 import shutil
-import os
 import uu
-import uuid
 import base64
+import logging
 from gemini_service import extract_medicine_info
 from supabase_client import get_supabase_client, get_authenticated_client
-from .auth import get_current_user, get_token
+from utils.image_variants import content_hash, public_url, store_variants, upload_object
+from .auth import get_current_user, get_token, model_rate_limit
+from utils.adherence import dose_schedules
+from utils.search_index import search_indexes
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 supabase = get_supabase_client()
 
-@router.post("/upload-prescription")
+@router.post("/upload-prescription", dependencies=[Depends(model_rate_limit)])
 async def upload_prescription(file: UploadFile = File(...), user_id: str = Depends(get_current_user), token: str = Depends(get_token)):
     try:
         # Use authenticated client for RLS
@@ -21,20 +26,32 @@ async def upload_prescription(file: UploadFile = File(...), user_id: str = Depen
         # 1. Read file
         content = await file.read()
         
-        # 2. Upload image to Supabase Storage
+        # 2. Upload image (and its resized variants) to Supabase Storage
+        # Names are content hashes, so objects are immutable and can be cached for a year.
         file_ext = file.filename.split(".")[-1]
-        file_path = f"{user_id}/{uuid.uuid4()}.{file_ext}"
+        digest = content_hash(content)
+        file_path = f"{user_id}/{digest}.{file_ext}"
+        thumbnail_url = None
+        medium_url = None
         
         try:
-            res = client.storage.from_("prescriptions").upload(file_path, content)
-            project_url = os.environ.get("SUPABASE_URL")
-            image_url = f"{project_url}/storage/v1/object/public/prescriptions/{file_path}"
+            upload_object(client, file_path, content, file.content_type or "image/jpeg")
+            image_url = public_url(file_path)
         except Exception as e:
-            print(f"Storage upload failed (bucket might be missing): {e}")
+            logger.warning(f"Storage upload failed (bucket might be missing): {e}")
             image_url = "https://placehold.co/600x400?text=Prescription"
+        else:
+            try:
+                variant_urls = await run_in_threadpool(store_variants, client, user_id, digest, content)
+                thumbnail_url = variant_urls["thumb"]
+                medium_url = variant_urls["medium"]
+            except Exception as e:
+                # Not fatal: the dashboard falls back to the original image
+                logger.warning(f"Image variant generation failed: {e}")
 
         # 3. Gemini Extraction (Direct Vision)
-        extracted_data = extract_medicine_info(content)
+        # Blocking SDK call: run it off the event loop so other requests keep being served
+        extracted_data = await run_in_threadpool(extract_medicine_info, content)
         medicines = extracted_data.get("medicines", [])
         doctor_name = extracted_data.get("doctor_name", "Unknown")
         patient_name = extracted_data.get("patient_name", "Unknown")
@@ -43,6 +60,8 @@ async def upload_prescription(file: UploadFile = File(...), user_id: str = Depen
         prescription_data = {
             "user_id": user_id,
             "image_url": image_url,
+            "thumbnail_url": thumbnail_url,
+            "medium_url": medium_url,
             "doctor_name": doctor_name,
             "patient_name": patient_name,
             "notes": "Uploaded via app"
@@ -71,14 +90,20 @@ async def upload_prescription(file: UploadFile = File(...), user_id: str = Depen
         
         if final_medicines:
             client.table("medicines").insert(final_medicines).execute()
+            # Keep the cached dosage analytics for this user up to date
+            dose_schedules.add_prescription(user_id, {**pres_res.data[0], "medicines": final_medicines})
+        search_indexes.invalidate(user_id)
 
         return {
             "prescription_id": prescription_id,
+            "image_url": image_url,
+            "thumbnail_url": thumbnail_url,
+            "medium_url": medium_url,
             "medicines": final_medicines,
             "doctor_name": doctor_name,
             "patient_name": patient_name
         }
 
     except Exception as e:
-        print(f"Error in upload: {e}")
+        logger.error(f"Error in upload: {e}")
         raise HTTPException(status_code=500, detail=str(e))
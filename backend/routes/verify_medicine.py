@@ -1,12 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from supabase_client import get_supabase_client, get_authenticated_client
-from .auth import get_current_user, get_token
+from .auth import get_current_user, get_token, model_rate_limit
 from gemini_service import verify_medicine_match
 import typing
 
 router = APIRouter()
 
-@router.post("/medicine/verify")
+@router.post("/medicine/verify", dependencies=[Depends(model_rate_limit)])
 async def verify_medicine(
     file: UploadFile = File(...),
     prescription_id: str = Form(...),
@@ -33,7 +34,8 @@ async def verify_medicine(
         prescribed_medicines = meds_res.data # List of dicts: [{'name': '...', 'purpose': '...'}, ...]
 
         # 3. Call Gemini verification service
-        verification_result = verify_medicine_match(content, prescribed_medicines)
+        # Blocking SDK call: run it off the event loop so other requests keep being served
+        verification_result = await run_in_threadpool(verify_medicine_match, content, prescribed_medicines)
 
         return verification_result
 
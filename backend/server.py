@@ -0,0 +1,123 @@
+# server.py
+# Production entry point: `python server.py` (or `python main.py`).
+# For local development keep using `uvicorn main:app --reload`.
+
+import logging
+import os
+import tempfile
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Used for rate limits and cache change stamps when several workers run and
+# RATE_LIMIT_STORE is not set.
+DEFAULT_SHARED_STORE = os.path.join(tempfile.gettempdir(), "medi_scribe_shared.db")
+
+
+def available_cpus() -> int:
+    try:
+        # Respects CPU affinity / container cpusets, unlike os.cpu_count()
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    """
+    WEB_CONCURRENCY if set (the convention Render/Heroku use), otherwise one worker per core.
+    Handlers are async and offload bcrypt/Gemini/image work to threads, so more
+    processes than cores only adds memory and contention.
+    """
+    value = os.environ.get("WEB_CONCURRENCY")
+    if value:
+        return max(1, int(value))
+    return max(1, available_cpus())
+
+
+def configure_shared_store(workers: int):
+    """
+    Rate limits and cache invalidation live in RATE_LIMIT_STORE, which every worker must share.
+    Defaults it to a SQLite file when running several workers; an explicit
+    in-memory store would give each worker its own limits, so refuse to start.
+    Must run before the workers are spawned (they inherit the environment).
+    """
+    if workers <= 1:
+        return
+    spec = os.environ.get("RATE_LIMIT_STORE")
+    if not spec:
+        os.environ["RATE_LIMIT_STORE"] = f"sqlite:{DEFAULT_SHARED_STORE}"
+        logger.info(f"{workers} workers: sharing rate limits via {os.environ['RATE_LIMIT_STORE']}")
+    elif not spec.startswith("sqlite:"):
+        raise SystemExit(
+            f"RATE_LIMIT_STORE={spec} is per-process but WEB_CONCURRENCY gives {workers} workers. "
+            "Use RATE_LIMIT_STORE=sqlite:/path/to/file.db (or leave it unset), or run one worker."
+        )
+
+
+def stop_workers_together():
+    """
+    uvicorn 0.27 stops workers one by one (terminate, wait, next), so a SIGTERM would take
+    up to one full drain per worker. Signal them all first, then wait.
+    """
+    from uvicorn.supervisors.multiprocess import Multiprocess
+    from utils.lifecycle import check_uvicorn_internals
+
+    check_uvicorn_internals(Multiprocess, "shutdown", "startup")
+
+    def shutdown(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        logging.getLogger("uvicorn.error").info(f"Stopping parent process [{self.pid}]")
+
+    Multiprocess.shutdown = shutdown
+
+
+def _installed(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def run(app: str = "main:app"):
+    from utils.access_log import setup_logging
+    setup_logging()
+
+    port = int(os.environ.get("PORT", 8000))
+    workers = worker_count()
+    configure_shared_store(workers)
+    stop_workers_together()
+    uvicorn.run(
+        app,
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=port,
+        workers=workers,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        # Longer than typical load balancer idle timeouts (60s) so the proxy closes first
+        timeout_keep_alive=int(os.environ.get("KEEP_ALIVE_TIMEOUT", 75)),
+        backlog=int(os.environ.get("BACKLOG", 2048)),
+        # Per-worker cap on concurrent connections; beyond it clients get a fast 503
+        limit_concurrency=int(os.environ.get("LIMIT_CONCURRENCY", 200)),
+        # On SIGTERM (after READINESS_DRAIN_DELAY, see utils/lifecycle.py): stop accepting,
+        # then wait this long for in-flight requests (Gemini calls). The two together must
+        # fit in the platform's kill grace period (30s on Render by default).
+        timeout_graceful_shutdown=int(os.environ.get("GRACEFUL_SHUTDOWN_TIMEOUT", 20)),
+        # Client IPs for rate limiting come from utils.rate_limiter.client_ip, which trusts
+        # X-Forwarded-For only from TRUSTED_PROXIES. uvicorn's own handling would either
+        # trust any client's header ("*") or need each proxy's exact IP.
+        proxy_headers=False,
+        # Requests are logged by AccessLogMiddleware
+        access_log=False,
+        reload=False,
+    )
+
+
+if __name__ == "__main__":
+    run()
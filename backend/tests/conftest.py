@@ -0,0 +1,9 @@
+import os
+
+# Set before any app module is imported: supabase_client builds its client at import time.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.test.test")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+# Production skips response validation; tests keep it on so model/schema drift
+# fails with a ValidationError.
+os.environ.setdefault("VALIDATE_RESPONSES", "true")
@@ -0,0 +1,153 @@
+import threading
+import time
+import uuid
+
+from postgrest.exceptions import APIError
+
+
+class Result:
+    def __init__(self, data=None, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.op = "select"
+        self.payload = None
+        self.on_conflict = None
+        self.ignore_duplicates = False
+
+    def select(self, *args, **kwargs):
+        self.op = "select"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def insert(self, data):
+        self.op, self.payload = "insert", data
+        return self
+
+    def upsert(self, data, on_conflict=None, ignore_duplicates=False):
+        self.op, self.payload = "upsert", data
+        self.on_conflict = on_conflict
+        self.ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, data):
+        self.op, self.payload = "update", data
+        return self
+
+    def execute(self):
+        return self.db.execute(self)
+
+
+class FakeStorage:
+    """
+    Single-bucket object store: `objects` maps path -> bytes.
+    `from_(bucket)` returns the store itself, which has the bucket methods.
+    """
+    def __init__(self):
+        self.objects = {}
+        self.uploads = []
+        self.downloads = 0
+
+    def from_(self, bucket):
+        return self
+
+    def download(self, path):
+        self.downloads += 1
+        if path not in self.objects:
+            raise Exception(f"Object not found: {path}")
+        return self.objects[path]
+
+    def upload(self, path, data, file_options=None):
+        self.objects[path] = data
+        self.uploads.append((path, file_options))
+
+
+class FakeSupabase:
+    """
+    In-memory stand-in for the supabase client, enough for the auth routes.
+    `profiles.email` is unique, and writes are atomic like a single SQL statement.
+    `latency` widens race windows between separate round-trips.
+    """
+    def __init__(self, latency: float = 0.0):
+        self.tables = {"profiles": []}
+        self.storage = FakeStorage()
+        # rpc name -> callable(params) returning a Result
+        self.functions = {"upsert_google_profile": self.upsert_google_profile}
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        """
+        Calls `functions[name](params)`; unknown functions fail like PostgREST does.
+        """
+        db = self
+
+        class Call:
+            def execute(self):
+                function = db.functions.get(name)
+                if function is None:
+                    db._round_trip()
+                    raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{name}"})
+                return function(params)
+        return Call()
+
+    def _round_trip(self):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _matches(self, row, filters):
+        return all(row.get(c) == v for c, v in filters)
+
+    def execute(self, query):
+        self._round_trip()
+        rows = self.tables.setdefault(query.table, [])
+        with self._lock:
+            if query.op == "select":
+                return Result([dict(r) for r in rows if self._matches(r, query.filters)])
+            if query.op == "update":
+                hits = [r for r in rows if self._matches(r, query.filters)]
+                for r in hits:
+                    r.update(query.payload)
+                return Result([dict(r) for r in hits])
+            new = dict(query.payload)
+            if any(r["email"] == new["email"] for r in rows):
+                if query.op == "upsert" and query.ignore_duplicates:
+                    return Result([])
+                raise Exception('duplicate key value violates unique constraint "profiles_email_key"')
+            new.setdefault("id", str(uuid.uuid4()))
+            rows.append(new)
+            return Result([dict(new)])
+
+    def upsert_google_profile(self, params):
+        self._round_trip()
+        rows = self.tables["profiles"]
+        with self._lock:
+            for r in rows:
+                if r["email"] == params["p_email"]:
+                    r["google_sub"] = r.get("google_sub") or params["p_google_sub"]
+                    r["avatar_url"] = r.get("avatar_url") or params["p_avatar_url"]
+                    return Result([dict(r)])
+            new = {
+                "id": params["p_id"],
+                "email": params["p_email"],
+                "full_name": params["p_full_name"],
+                "google_sub": params["p_google_sub"],
+                "avatar_url": params["p_avatar_url"],
+                "plan": "free",
+            }
+            rows.append(new)
+            return Result([dict(new)])
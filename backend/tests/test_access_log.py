@@ -0,0 +1,57 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils import access_log
+from utils.access_log import AccessLogMiddleware
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.add_middleware(AccessLogMiddleware, sample_rate=1.0, exclude_paths=["/"])
+
+    @app.get("/")
+    def root():
+        return {}
+
+    @app.get("/items")
+    def items():
+        logging.getLogger("routes.items").info("inside handler")
+        return {}
+
+    return app
+
+
+def test_request_id_is_echoed_and_tagged_on_downstream_logs(app, caplog):
+    caplog.handler.addFilter(access_log.RequestIdFilter())
+    with caplog.at_level(logging.INFO):
+        res = TestClient(app).get("/items", headers={"X-Request-ID": "abc123"})
+
+    assert res.headers["x-request-id"] == "abc123"
+    handler_logs = [r for r in caplog.records if r.name == "routes.items"]
+    assert handler_logs[0].request_id == "abc123"
+    assert any(r.name == "medi_scribe.access" and "path=/items" in r.getMessage() for r in caplog.records)
+
+
+def test_excluded_paths_are_not_logged(app, caplog):
+    with caplog.at_level(logging.INFO):
+        res = TestClient(app).get("/")
+
+    assert "x-request-id" not in res.headers
+    assert not [r for r in caplog.records if r.name == "medi_scribe.access"]
+
+
+def test_setup_logging_caps_http_client_loggers(monkeypatch):
+    monkeypatch.setattr(access_log, "_listener", None)
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    try:
+        access_log.setup_logging("INFO")
+        assert not logging.getLogger("httpx").isEnabledFor(logging.INFO)
+        assert not logging.getLogger("httpcore").isEnabledFor(logging.INFO)
+    finally:
+        root.handlers[:] = handlers
+        root.setLevel(level)
@@ -0,0 +1,112 @@
+from datetime import date
+
+import numpy as np
+
+from utils.adherence import DoseSchedule, ScheduleCache, dose_matrix
+from utils.rate_limiter import MemoryStore, SQLiteStore
+
+TODAY = date(2026, 3, 1)
+
+
+def prescription(id, created_at="2026-03-01", medicines=None):
+    return {
+        "id": id,
+        "created_at": created_at,
+        "medicines": medicines if medicines is not None else [
+            {"name": "Augmentin 625", "dosage_pattern": "1-0-1", "duration_days": 5},
+            {"name": "Pan 40", "dosage_pattern": "OD", "total_quantity": 10},
+        ],
+    }
+
+
+def test_dose_matrix_matches_per_user_loop():
+    rng = np.random.default_rng(0)
+    n_users, n_courses, days = 50, 400, 60
+    users = rng.integers(0, n_users, n_courses)
+    starts = TODAY.toordinal() + rng.integers(-30, 60, n_courses)
+    ends = starts + rng.integers(1, 30, n_courses)
+    daily = rng.integers(1, 4, n_courses)
+
+    matrix = dose_matrix(users, starts, ends, daily, n_users, TODAY, days)
+
+    expected = np.zeros((n_users, days), dtype=np.int64)
+    for u, s, e, d in zip(users, starts, ends, daily):
+        for day in range(days):
+            if s <= TODAY.toordinal() + day < e:
+                expected[u, day] += d
+    assert (matrix == expected).all()
+
+
+def test_summary_and_incremental_updates():
+    schedule = DoseSchedule.from_prescriptions([prescription("p1")])
+    summary = schedule.summary(TODAY, days=14)
+
+    assert summary["doses_per_day"][:5] == [3] * 5
+    assert summary["doses_per_day"][5:10] == [1] * 5
+    assert summary["max_overlapping_medicines"] == 2
+
+    schedule.add_prescription(prescription("p2", medicines=[{"name": "Dolo", "dosage_pattern": "TDS", "duration_days": 2}]))
+    assert schedule.daily_doses(TODAY, 3).tolist() == [6, 6, 3]
+    schedule.remove_prescription("p1")
+    assert schedule.daily_doses(TODAY, 3).tolist() == [3, 3, 0]
+
+
+def test_cache_applies_local_changes_in_place():
+    cache = ScheduleCache(store=MemoryStore())
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return [prescription("p1")]
+
+    schedule = cache.get("u1", loader)
+    cache.add_prescription("u1", prescription("p2"))
+
+    assert cache.get("u1", loader) is schedule
+    assert len(schedule) == 4
+    assert len(loads) == 1
+
+
+def test_change_in_another_worker_invalidates(tmp_path):
+    path = str(tmp_path / "shared.db")
+    worker_a = ScheduleCache(store=SQLiteStore(path))
+    worker_b = ScheduleCache(store=SQLiteStore(path))
+    rows = [prescription("p1")]
+
+    worker_a.get("u1", lambda: rows)
+    worker_b.get("u1", lambda: rows)
+    rows.append(prescription("p2"))
+    worker_b.add_prescription("u1", rows[-1])
+
+    assert len(worker_b.get("u1", lambda: [])) == 4
+    assert len(worker_a.get("u1", lambda: rows)) == 4
+
+
+def test_stale_entry_is_dropped_instead_of_patched(tmp_path):
+    path = str(tmp_path / "shared.db")
+    worker_a = ScheduleCache(store=SQLiteStore(path))
+    worker_b = ScheduleCache(store=SQLiteStore(path))
+    worker_a.get("u1", lambda: [prescription("p1")])
+
+    worker_b.add_prescription("u1", prescription("p2"))
+    worker_a.add_prescription("u1", prescription("p3"))
+
+    assert len(worker_a) == 0
+
+
+def test_cache_is_bounded_lru():
+    cache = ScheduleCache(max_users=3, store=MemoryStore())
+    for user in ("u1", "u2", "u3"):
+        cache.get(user, lambda: [])
+    cache.get("u1", lambda: [])
+    cache.get("u4", lambda: [])
+
+    assert list(cache._entries) == ["u3", "u1", "u4"]
+
+
+def test_expired_entries_are_reloaded_and_pruned():
+    cache = ScheduleCache(ttl=0, store=MemoryStore())
+    first = cache.get("u1", lambda: [])
+
+    assert cache.get("u1", lambda: []) is not first
+    assert len(cache) == 0
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import auth
+from tests.fake_supabase import FakeSupabase
+
+GOOGLE_INFO = {"email": "new@example.com", "sub": "google-123", "name": "New User", "picture": "https://img/p.png"}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeSupabase(latency=0.02)
+    monkeypatch.setattr(auth, "supabase", fake)
+    monkeypatch.setattr(auth.id_token, "verify_oauth2_token", lambda *args, **kwargs: dict(GOOGLE_INFO))
+    return fake
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.include_router(auth.router)
+    return app
+
+
+def test_parallel_first_google_logins_create_one_profile(db, app):
+    def login(_):
+        with TestClient(app) as client:
+            return client.post("/auth/google", json={"token": "t"})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(login, range(8)))
+
+    assert [r.status_code for r in responses] == [200] * 8
+    assert len(db.tables["profiles"]) == 1
+    profile_id = db.tables["profiles"][0]["id"]
+    assert {r.json()["user"]["id"] for r in responses} == {profile_id}
+    # One round-trip per login (the old flow needed up to three)
+    assert db.calls == 8
+
+
+def test_google_login_fills_missing_fields_on_existing_profile(db, app):
+    db.tables["profiles"].append({"id": "u1", "email": GOOGLE_INFO["email"], "full_name": "Existing", "google_sub": None, "avatar_url": None})
+
+    res = TestClient(app).post("/auth/google", json={"token": "t"})
+
+    assert res.status_code == 200
+    assert res.json()["user"]["id"] == "u1"
+    assert res.json()["user"]["name"] == "Existing"
+    assert db.tables["profiles"][0]["google_sub"] == GOOGLE_INFO["sub"]
+
+
+def test_register_then_duplicate_email_returns_400(db, app):
+    client = TestClient(app)
+    payload = {"email": "a@example.com", "password": "secret", "full_name": "A"}
+
+    first = client.post("/auth/register", json=payload)
+    second = client.post("/auth/register", json=payload)
+
+    assert first.status_code == 200
+    assert second.status_code == 400
+    assert second.json()["detail"] == "User with this email already exists."
+    assert len(db.tables["profiles"]) == 1
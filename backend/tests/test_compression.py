@@ -0,0 +1,76 @@
+import gzip
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.testclient import TestClient
+
+from utils import compression
+
+LARGE = [{"name": f"Medicine {i}", "purpose": "A proton pump inhibitor used to reduce stomach acid."} for i in range(100)]
+
+
+def make_client(minimum_size=1024) -> TestClient:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.get("/large")
+    def large():
+        return LARGE
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    compression.add_compression(app, minimum_size=minimum_size)
+    return TestClient(app)
+
+
+def raw_get(client, path, accept_encoding):
+    # Stream so the client does not decode the body
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("accept, encoding, decode", [
+    ("br, gzip", "br", brotli.decompress),
+    ("gzip", "gzip", gzip.decompress),
+    ("identity", None, lambda body: body),
+])
+def test_negotiates_encoding(accept, encoding, decode):
+    response, body = raw_get(make_client(), "/large", accept)
+
+    assert response.headers.get("content-encoding") == encoding
+    assert decode(body) == ORJSONResponse(LARGE).body
+
+
+def test_small_responses_are_not_compressed():
+    response, body = raw_get(make_client(), "/small", "br, gzip")
+
+    assert "content-encoding" not in response.headers
+    assert body == b'{"ok":true}'
+
+
+def test_minimum_size_is_configurable():
+    response, _ = raw_get(make_client(minimum_size=10**6), "/large", "br, gzip")
+
+    assert "content-encoding" not in response.headers
+
+
+def test_gzip_only_without_brotli_asgi(monkeypatch):
+    monkeypatch.setattr(compression, "BrotliMiddleware", None)
+    client = make_client()
+
+    assert raw_get(client, "/large", "br")[0].headers.get("content-encoding") is None
+    response, body = raw_get(client, "/large", "br, gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == ORJSONResponse(LARGE).body
+
+
+def test_app_compresses_responses():
+    from main import app
+
+    response, body = raw_get(TestClient(app), "/openapi.json", "br")
+
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(body).startswith(b'{"openapi"')
@@ -0,0 +1,74 @@
+import io
+
+from PIL import Image
+
+from tests.fake_supabase import FakeSupabase
+from utils.image_variants import (
+    CACHE_CONTROL, backfill_candidates, backfill_variants, public_url, upload_object,
+)
+
+PLACEHOLDER = "https://placehold.co/600x400?text=Prescription"
+
+
+def jpeg_bytes(size=(2000, 1500)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, (200, 180, 160)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def row(id, path=None, **overrides):
+    data = {"id": id, "image_url": public_url(path) if path else PLACEHOLDER, "thumbnail_url": None}
+    data.update(overrides)
+    return data
+
+
+def test_candidates_skip_placeholders_before_limiting():
+    rows = [row(f"p{i}") for i in range(10)] + [row("real", "u/a.jpg"), row("done", "u/b.jpg", thumbnail_url="t")]
+
+    assert [p["id"] for p in backfill_candidates(rows, 5)] == ["real"]
+
+
+def test_backfill_stores_variants():
+    db = FakeSupabase()
+    db.storage.objects["u/a.jpg"] = jpeg_bytes()
+    db.tables["prescriptions"] = [row("p1", "u/a.jpg")]
+
+    backfill_variants(db, db.tables["prescriptions"][:])
+
+    saved = db.tables["prescriptions"][0]
+    assert saved["thumbnail_url"].endswith("_thumb.webp")
+    assert saved["medium_url"].endswith("_medium.webp")
+    thumb = Image.open(io.BytesIO(db.storage.objects[saved["thumbnail_url"].split("/prescriptions/", 1)[1]]))
+    assert max(thumb.size) == 320
+
+
+def test_undecodable_original_is_recorded_and_not_retried():
+    db = FakeSupabase()
+    db.storage.objects["u/a.heic"] = b"not an image we can decode"
+    db.tables["prescriptions"] = [row("p1", "u/a.heic")]
+
+    backfill_variants(db, backfill_candidates(db.tables["prescriptions"], 5))
+
+    saved = db.tables["prescriptions"][0]
+    assert saved["thumbnail_url"] == saved["medium_url"] == saved["image_url"]
+    assert backfill_candidates(db.tables["prescriptions"], 5) == []
+    assert db.storage.downloads == 1
+
+
+def test_missing_object_is_left_for_retry():
+    db = FakeSupabase()
+    db.tables["prescriptions"] = [row("p1", "u/gone.jpg")]
+
+    backfill_variants(db, db.tables["prescriptions"][:])
+
+    assert db.tables["prescriptions"][0]["thumbnail_url"] is None
+
+
+def test_uploads_are_immutable():
+    db = FakeSupabase()
+    upload_object(db, "u/a.webp", b"x", "image/webp")
+
+    options = db.storage.uploads[0][1]
+    assert options["cache-control"] == CACHE_CONTROL
+    # storage3 renders this as "max-age=31536000, immutable"
+    assert CACHE_CONTROL.endswith("immutable")
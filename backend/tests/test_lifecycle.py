@@ -0,0 +1,100 @@
+import asyncio
+import os
+
+import pytest
+import uvicorn
+
+import server
+from utils.lifecycle import install_drain_hook, lifecycle
+
+
+@pytest.fixture
+def drain_hook(monkeypatch):
+    original = getattr(uvicorn.Server.handle_exit, "original", uvicorn.Server.handle_exit)
+    monkeypatch.setattr(uvicorn.Server, "handle_exit", original)
+    monkeypatch.setattr(lifecycle, "draining", False)
+    install_drain_hook(delay=0.05)
+    return uvicorn.Server(uvicorn.Config(app=None))
+
+
+def test_sigterm_marks_draining_before_uvicorn_shuts_down(drain_hook):
+    server_ = drain_hook
+
+    async def scenario():
+        server_.handle_exit(15, None)
+        seen = (lifecycle.draining, server_.should_exit)
+        await asyncio.sleep(0.1)
+        return seen, server_.should_exit
+
+    (draining, exiting_early), exiting_later = asyncio.run(scenario())
+
+    assert draining and not exiting_early
+    assert exiting_later
+    assert not server_.force_exit
+
+
+def test_second_signal_skips_the_delay(drain_hook):
+    server_ = drain_hook
+
+    async def scenario():
+        server_.handle_exit(2, None)
+        server_.handle_exit(2, None)
+        exiting = server_.should_exit
+        await asyncio.sleep(0.1)
+        return exiting
+
+    assert asyncio.run(scenario())
+    # The delayed call must not turn into a second SIGINT (force exit)
+    assert not server_.force_exit
+
+
+def test_readiness_fails_while_draining(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    monkeypatch.setattr(lifecycle, "draining", True)
+    response = TestClient(app).get("/readyz")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "draining"}
+
+
+def test_several_workers_default_to_shared_sqlite_store(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_STORE", "")
+    server.configure_shared_store(4)
+
+    assert os.environ["RATE_LIMIT_STORE"] == f"sqlite:{server.DEFAULT_SHARED_STORE}"
+
+
+def test_several_workers_refuse_memory_store(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_STORE", "memory")
+
+    with pytest.raises(SystemExit):
+        server.configure_shared_store(2)
+    server.configure_shared_store(1)
+
+
+def test_readiness_failure_does_not_leak_details(monkeypatch, caplog):
+    from fastapi.testclient import TestClient
+    import main
+
+    class BrokenClient:
+        def table(self, name):
+            raise ConnectionError("https://secret-project.supabase.co refused the connection")
+
+    monkeypatch.setattr(main, "get_supabase_client", lambda: BrokenClient())
+    response = TestClient(main.app).get("/readyz")
+
+    assert response.status_code == 503
+    assert response.json() == {"status": "unavailable", "detail": "database unreachable"}
+    assert "secret-project" in caplog.text
+
+
+def test_shutdown_patches_refuse_other_uvicorn_versions(monkeypatch):
+    monkeypatch.setattr(uvicorn, "__version__", "0.30.0")
+    monkeypatch.setattr(uvicorn.Server, "handle_exit", getattr(uvicorn.Server.handle_exit, "original", uvicorn.Server.handle_exit))
+
+    with pytest.raises(RuntimeError, match="0.30.0"):
+        install_drain_hook()
+    with pytest.raises(RuntimeError, match="0.30.0"):
+        server.stop_workers_together()
@@ -0,0 +1,123 @@
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from routes import auth
+from utils import rate_limiter
+from utils.rate_limiter import DailyQuota, GCRALimiter, MemoryStore, SQLiteStore, client_ip, rate_limit_headers
+from utils.security import create_access_token
+
+NOW = 1_000_000.0
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryStore()
+    return SQLiteStore(str(tmp_path / "limits.db"))
+
+
+def test_gcra_allows_burst_then_denies_with_retry_after(store):
+    limiter = GCRALimiter(store, 3, 60)
+
+    results = [limiter.hit("k", NOW) for _ in range(4)]
+
+    assert [r[0] for r in results] == [True, True, True, False]
+    assert [r[2] for r in results[:3]] == [2, 1, 0]
+    assert results[3][4] == pytest.approx(20.0)
+    assert rate_limit_headers(results[3])["Retry-After"] == "20"
+    assert limiter.hit("k", NOW + 20)[0]
+
+
+def test_daily_quota_resets_at_midnight_utc(store):
+    quota = DailyQuota(store, {"free": 2, "pro": 5})
+
+    assert [quota.hit("u", "free", NOW)[0] for _ in range(3)] == [True, True, False]
+    assert quota.hit("u", "pro", NOW)[0]
+    assert quota.hit("u", "unknown-plan", NOW + 86400)[0]
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "limits.db")
+    worker_a = GCRALimiter(SQLiteStore(path), 2, 60)
+    worker_b = GCRALimiter(SQLiteStore(path), 2, 60)
+
+    assert worker_a.hit("k", NOW)[0]
+    assert worker_b.hit("k", NOW)[0]
+    assert not worker_a.hit("k", NOW)[0]
+
+
+def test_memory_store_is_bounded_lru():
+    store = MemoryStore(max_keys=3)
+    limiter = GCRALimiter(store, 10, 60)
+    quota = DailyQuota(store, {"free": 10})
+    for key in ("a", "b", "c"):
+        limiter.hit(key, NOW)
+        quota.hit(key, "free", NOW)
+    limiter.hit("a", NOW)
+    limiter.hit("d", NOW)
+    quota.hit("d", "free", NOW)
+
+    assert list(store._tats) == ["c", "a", "d"]
+    assert len(store._counters) == 3
+    for i in range(3):
+        store.touch(f"s{i}", NOW, NOW + 60)
+    store.touch("s3", NOW, NOW + 60)
+    assert list(store._stamps) == ["s1", "s2", "s3"]
+
+
+def test_sqlite_store_deletes_expired_rows(tmp_path):
+    store = SQLiteStore(str(tmp_path / "limits.db"), cleanup_every=10)
+    limiter = GCRALimiter(store, 10, 60)
+    quota = DailyQuota(store, {"free": 10})
+    for i in range(5):
+        limiter.hit(f"ip:{i}", NOW)
+        quota.hit(f"user:{i}", "free", NOW)
+    store.touch("schedule:u1", NOW, NOW + 300)
+
+    def rows(table):
+        return store._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    assert (rows("gcra"), rows("counters"), rows("stamps")) == (5, 5, 1)
+
+    # Two days later: old TATs, yesterday's quota counters and stamps are all expired
+    later = NOW + 2 * 86400
+    for i in range(9):
+        limiter.hit("ip:new", later)
+
+    assert (rows("gcra"), rows("counters"), rows("stamps")) == (1, 0, 0)
+
+
+@pytest.mark.parametrize("peer, forwarded_for, expected", [
+    ("203.0.113.9", None, "203.0.113.9"),
+    # Untrusted peer: header is ignored
+    ("203.0.113.9", "1.2.3.4", "203.0.113.9"),
+    # Trusted proxy: right-most untrusted hop wins, spoofed left entries are ignored
+    ("10.0.0.5", "6.6.6.6, 198.51.100.7", "198.51.100.7"),
+    ("10.0.0.5", "198.51.100.7, 10.0.0.9", "198.51.100.7"),
+    ("10.0.0.5", "", "10.0.0.5"),
+    (None, None, "unknown"),
+])
+def test_client_ip(peer, forwarded_for, expected):
+    assert client_ip(peer, forwarded_for) == expected
+
+
+def test_model_rate_limit_sets_headers_and_returns_429(monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr(auth, "ip_limiter", GCRALimiter(store, 100, 60))
+    monkeypatch.setattr(auth, "user_limiter", GCRALimiter(store, 2, 60))
+    monkeypatch.setattr(auth, "daily_quota", DailyQuota(store, rate_limiter.parse_quotas("free:50")))
+    app = FastAPI()
+
+    @app.post("/expensive", dependencies=[Depends(auth.model_rate_limit)])
+    def expensive():
+        return {"ok": True}
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'u1', 'plan': 'free'})}"}
+    responses = [client.post("/expensive", headers=headers) for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[0].headers["RateLimit-Limit"] == "2"
+    assert responses[0].headers["RateLimit-Remaining"] == "1"
+    assert "Retry-After" in responses[2].headers
@@ -0,0 +1,87 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from postgrest.exceptions import APIError
+
+from routes import search
+from tests.fake_supabase import FakeSupabase, Result
+from utils.rate_limiter import MemoryStore
+from utils.search_index import PrescriptionSearchIndex, SearchIndexCache
+from utils.security import create_access_token
+
+ROWS = [
+    {
+        "id": f"p{i}",
+        "user_id": "u1",
+        "created_at": f"2026-01-0{i + 1}T10:00:00+00:00",
+        "doctor_name": "Dr. Rao",
+        "medicines": [{"name": "Augmentin 625", "purpose": "Antibiotic", "instructions": "After food"}],
+    }
+    for i in range(2)
+]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeSupabase()
+    fake.tables["prescriptions"] = [dict(r) for r in ROWS]
+    fake.rpc_calls = []
+    rpc = fake.rpc
+
+    def counting_rpc(name, params):
+        fake.rpc_calls.append(name)
+        return rpc(name, params)
+
+    fake.rpc = counting_rpc
+    monkeypatch.setattr(search, "get_authenticated_client", lambda token: fake)
+    monkeypatch.setattr(search, "search_indexes", SearchIndexCache(store=MemoryStore()))
+    monkeypatch.setattr(search, "_rpc_missing_until", 0.0)
+    return fake
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(search.router)
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'u1'})}"
+    return client
+
+
+def sql_search(params):
+    # Stand-in for the SQL function: same response shape
+    found = PrescriptionSearchIndex(ROWS).search(params["p_query"], limit=params["p_limit"], offset=params["p_offset"])
+    return Result(found)
+
+
+def test_missing_function_falls_back_and_is_remembered(db, client):
+    first = client.get("/search", params={"q": "augmentin"})
+    second = client.get("/search", params={"q": "augmentin"})
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["total"] == 2
+    assert db.rpc_calls == ["search_prescriptions"]
+
+
+def test_other_rpc_errors_are_not_hidden(db, client):
+    def failing(params):
+        raise APIError({"code": "PGRST301", "message": "JWT expired"})
+    db.functions["search_prescriptions"] = failing
+
+    response = client.get("/search", params={"q": "augmentin"})
+
+    assert response.status_code == 500
+    assert "JWT expired" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("offset", [0, 1, 5])
+def test_rpc_and_fallback_report_the_same_total(db, client, offset):
+    params = {"q": "augmentin", "limit": 1, "offset": offset}
+    fallback = client.get("/search", params=params).json()
+
+    search._rpc_missing_until = 0.0
+    db.functions["search_prescriptions"] = sql_search
+    rpc = client.get("/search", params=params).json()
+
+    assert rpc["total"] == fallback["total"] == 2
+    assert [r["id"] for r in rpc["results"]] == [r["id"] for r in fallback["results"]]
@@ -0,0 +1,57 @@
+from utils.rate_limiter import MemoryStore, SQLiteStore
+from utils.search_index import PrescriptionSearchIndex, SearchIndexCache
+
+
+def prescription(id, created_at, doctor, *medicines):
+    return {
+        "id": id,
+        "created_at": created_at,
+        "doctor_name": doctor,
+        "medicines": [{"name": name, "purpose": purpose} for name, purpose in medicines],
+    }
+
+
+ROWS = [
+    prescription("p1", "2025-12-20T10:00:00Z", "Dr. Mehta", ("Augmentin 625", "Antibiotic for infection")),
+    prescription("p2", "2026-02-01T10:00:00Z", "Dr. Rao", ("Pan 40", "Acidity"), ("Azithral 500", "antibiotic")),
+    prescription("p3", "2026-02-10T10:00:00Z", "Dr. Augustine", ("Dolo 650", "Fever")),
+]
+
+
+def test_exact_prefix_and_fuzzy_matches_are_ranked():
+    index = PrescriptionSearchIndex(ROWS)
+
+    assert [r["id"] for r in index.search("augmentin")["results"]][0] == "p1"
+    assert {r["id"] for r in index.search("antibio")["results"]} == {"p1", "p2"}
+    assert index.search("augmentn")["results"][0]["matched_medicines"] == ["Augmentin 625"]
+
+
+def test_date_range_and_pagination():
+    index = PrescriptionSearchIndex(ROWS)
+
+    winter = index.search("antibiotic", date_from="2025-12-01", date_to="2026-01-01")
+    assert [r["id"] for r in winter["results"]] == ["p1"]
+    page = index.search("antibiotic", limit=1, offset=1)
+    assert page["total"] == 2 and len(page["results"]) == 1
+
+
+def test_upload_in_another_worker_is_searchable(tmp_path):
+    path = str(tmp_path / "shared.db")
+    worker_a = SearchIndexCache(store=SQLiteStore(path))
+    worker_b = SearchIndexCache(store=SQLiteStore(path))
+    rows = ROWS[:2]
+
+    assert worker_a.get("u1", lambda: rows).search("dolo")["total"] == 0
+    rows = ROWS
+    worker_b.invalidate("u1")
+
+    assert worker_a.get("u1", lambda: rows).search("dolo")["total"] == 1
+
+
+def test_cache_is_bounded():
+    cache = SearchIndexCache(max_users=2, store=MemoryStore())
+    for user in ("u1", "u2", "u3"):
+        cache.get(user, lambda: ROWS)
+
+    assert len(cache) == 2
+    assert list(cache._entries) == ["u2", "u3"]
@@ -0,0 +1,89 @@
+import json
+
+import orjson
+import pytest
+from pydantic import ValidationError
+
+from models.serializers import medicines_response, prescription_response, prescriptions_response
+
+PRESCRIPTION_ID = "3fa85f64-5717-4562-b3fc-2c963f66afa6"
+
+
+def medicine_row(**overrides):
+    row = {
+        "id": "6fa85f64-5717-4562-b3fc-2c963f66afa6",
+        "prescription_id": PRESCRIPTION_ID,
+        "created_at": "2026-01-01T10:00:00+00:00",
+        "name": "Augmentin 625",
+        "type": "tablet",
+        "dosage_pattern": "1-0-1",
+        "instructions": "After food",
+        "total_quantity": 10,
+        "duration_days": 5,
+        "purpose": "An antibiotic.",
+    }
+    row.update(overrides)
+    return row
+
+
+def prescription_row(**overrides):
+    row = {
+        "id": PRESCRIPTION_ID,
+        "user_id": "9fa85f64-5717-4562-b3fc-2c963f66afa6",
+        "image_url": "https://example.supabase.co/storage/v1/object/public/prescriptions/u/x.jpg",
+        "thumbnail_url": None,
+        "medium_url": None,
+        "created_at": "2026-01-01T10:00:00+00:00",
+        "updated_at": None,
+        "doctor_name": "Dr Rao",
+        "patient_name": None,
+        "notes": "Uploaded via app",
+        "medicines": [medicine_row()],
+    }
+    row.update(overrides)
+    return row
+
+
+def test_nullable_db_columns_validate():
+    row = prescription_row(image_url=None, medicines=[medicine_row(name=None, created_at=None)])
+
+    body = json.loads(prescriptions_response([row], validate=True).body)
+
+    assert body[0]["image_url"] is None
+    assert body[0]["medicines"][0]["name"] is None
+
+
+def test_invalid_row_raises_when_validating():
+    rows = [prescription_row(), prescription_row(id="not-a-uuid")]
+
+    with pytest.raises(ValidationError):
+        prescriptions_response(rows, validate=True)
+
+
+def test_unvalidated_path_is_plain_orjson_of_the_rows():
+    rows = [prescription_row() for _ in range(3)]
+
+    assert prescriptions_response(rows, validate=False).body == orjson.dumps(rows)
+
+
+def test_validated_and_unvalidated_paths_return_the_same_fields():
+    row = prescription_row()
+
+    validated = json.loads(prescription_response(row, validate=True).body)
+    constructed = json.loads(prescription_response(row, validate=False).body)
+
+    assert validated.keys() == constructed.keys()
+    assert validated["medicines"][0].keys() == constructed["medicines"][0].keys()
+    assert validated["doctor_name"] == constructed["doctor_name"] == "Dr Rao"
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_unknown_columns_are_dropped(validate):
+    medicines = json.loads(medicines_response([medicine_row(search_tsv="'augmentin':1")], validate=validate).body)
+    row = prescription_row(search_tsv="'rao':1", medicines=[medicine_row(search_tsv="'augmentin':1")])
+    prescription = json.loads(prescription_response(row, validate=validate).body)
+
+    assert "search_tsv" not in medicines[0]
+    assert "search_tsv" not in prescription
+    assert "search_tsv" not in prescription["medicines"][0]
+    assert prescription["medicines"][0]["name"] == "Augmentin 625"
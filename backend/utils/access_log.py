@@ -0,0 +1,120 @@
+import atexit
+import contextvars
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+import uuid
+
+# Request ID of the request currently being handled. Any log record emitted while
+# serving a request (routes, gemini_service, ...) gets tagged with it.
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+ACCESS_LOG_SAMPLE_RATE = float(os.environ.get("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+ACCESS_LOG_EXCLUDE_PATHS = os.environ.get("ACCESS_LOG_EXCLUDE_PATHS", "/,/healthz,/readyz,/favicon.ico")
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+# Libraries that log every outgoing call at INFO (e.g. httpx logs each Supabase request,
+# including the one /readyz makes on every probe). Capped at WARNING.
+NOISY_LOGGERS = ("httpx", "httpcore", "hpack", "urllib3")
+
+access_logger = logging.getLogger("medi_scribe.access")
+
+
+def get_request_id() -> str:
+    return request_id_var.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Copies the current request ID onto every record so the formatter can print it.
+    Runs in the calling thread, before the record is handed to the queue.
+    """
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+_listener = None
+
+
+def setup_logging(level: str = LOG_LEVEL):
+    """
+    Route all logging through a QueueHandler so request handlers never block on stdout.
+    A background QueueListener does the actual (synchronous) writes.
+    Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(
+        "%(asctime)s level=%(levelname)s logger=%(name)s request_id=%(request_id)s %(message)s"
+    ))
+
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(max(logging.WARNING, root.level))
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class AccessLogMiddleware:
+    """
+    Pure ASGI access-log middleware.
+    - Excluded paths (health checks, probes) are passed straight through with no extra work.
+    - Other requests get a request ID (from `X-Request-ID` or freshly generated),
+      echoed back in the response headers.
+    - Only a `sample_rate` fraction of requests is written to the access log;
+      4xx/5xx responses are always logged.
+    """
+    def __init__(self, app, sample_rate: float = ACCESS_LOG_SAMPLE_RATE, exclude_paths=None):
+        self.app = app
+        self.sample_rate = sample_rate
+        if exclude_paths is None:
+            exclude_paths = ACCESS_LOG_EXCLUDE_PATHS.split(",")
+        self.exclude_paths = frozenset(p.strip() for p in exclude_paths if p.strip())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        if not request_id:
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if status_code >= 400 or self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+                access_logger.info(
+                    "method=%s path=%s status=%d duration_ms=%.1f",
+                    scope["method"], scope["path"], status_code,
+                    (time.perf_counter() - start) * 1000,
+                )
+            request_id_var.reset(token)
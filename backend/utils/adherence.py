@@ -0,0 +1,187 @@
+from datetime import date, datetime
+import numpy as np
+from utils.dosage_calculator import calculate_duration, get_daily_count
+from utils.user_cache import UserCache
+
+# How long a user's cached schedule is trusted before it is reloaded from the DB.
+# Writes through the upload/delete routes are picked up immediately by every worker;
+# this bounds staleness from changes made elsewhere (e.g. directly in Supabase).
+SCHEDULE_CACHE_TTL = 300
+# Schedules kept per worker; least recently used ones are dropped first.
+SCHEDULE_CACHE_MAX_USERS = 10_000
+
+
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        return date.fromisoformat(value[:10])
+    return date.today()
+
+
+def medicine_course(med: dict, start: date):
+    """
+    (start_day, end_day, doses_per_day) for a medicine, with days as date ordinals
+    and end_day exclusive. None if the pattern or duration cannot be worked out.
+    """
+    pattern = med.get("dosage_pattern")
+    daily = get_daily_count(pattern)
+    if not daily:
+        return None
+    duration = med.get("duration_days") or calculate_duration(med.get("total_quantity"), pattern)
+    if not duration:
+        return None
+    start_day = start.toordinal()
+    return start_day, start_day + int(duration), daily
+
+
+def dose_matrix(user_index, starts, ends, daily, n_users: int, window_start: date, days: int) -> np.ndarray:
+    """
+    Daily dose totals for many users at once: an (n_users, days) int16 array whose
+    cell [u, d] is the number of doses user u takes on window_start + d.
+
+    Inputs are parallel arrays with one entry per medicine course. Each course adds
+    `daily` at its (clipped) start column and removes it at its end column of a
+    difference array; a cumulative sum along the day axis gives the totals.
+    """
+    origin = window_start.toordinal()
+    s = np.clip(np.asarray(starts, dtype=np.int64) - origin, 0, days)
+    e = np.clip(np.asarray(ends, dtype=np.int64) - origin, 0, days)
+    daily = np.asarray(daily, dtype=np.int16)
+    user_index = np.asarray(user_index, dtype=np.int64)
+
+    diff = np.zeros((n_users, days + 1), dtype=np.int16)
+    np.add.at(diff, (user_index, s), daily)
+    np.add.at(diff, (user_index, e), -daily)
+    return np.cumsum(diff[:, :days], axis=1, dtype=np.int16)
+
+
+class DoseSchedule:
+    """
+    One user's medicine courses, stored column-wise (one NumPy array per field).
+    Prescriptions can be added or removed without reloading the rest.
+    """
+    def __init__(self):
+        self.prescription_ids = np.empty(0, dtype=object)
+        self.names = np.empty(0, dtype=object)
+        self.starts = np.empty(0, dtype=np.int32)
+        self.ends = np.empty(0, dtype=np.int32)
+        self.daily = np.empty(0, dtype=np.int16)
+
+    @classmethod
+    def from_prescriptions(cls, prescriptions: list) -> "DoseSchedule":
+        schedule = cls()
+        for pres in prescriptions:
+            schedule.add_prescription(pres)
+        return schedule
+
+    def __len__(self):
+        return len(self.starts)
+
+    def add_prescription(self, prescription: dict):
+        """
+        `prescription` is a DB row with `id`, `created_at` and a `medicines` list.
+        Courses start on the day the prescription was created.
+        """
+        start = _to_date(prescription.get("created_at"))
+        ids, names, starts, ends, daily = [], [], [], [], []
+        for med in prescription.get("medicines") or []:
+            course = medicine_course(med, start)
+            if course is None:
+                continue
+            ids.append(str(prescription["id"]))
+            names.append(med.get("name"))
+            starts.append(course[0])
+            ends.append(course[1])
+            daily.append(course[2])
+        if not ids:
+            return
+
+        self.prescription_ids = np.concatenate([self.prescription_ids, np.array(ids, dtype=object)])
+        self.names = np.concatenate([self.names, np.array(names, dtype=object)])
+        self.starts = np.concatenate([self.starts, np.array(starts, dtype=np.int32)])
+        self.ends = np.concatenate([self.ends, np.array(ends, dtype=np.int32)])
+        self.daily = np.concatenate([self.daily, np.array(daily, dtype=np.int16)])
+
+    def remove_prescription(self, prescription_id: str):
+        keep = self.prescription_ids != str(prescription_id)
+        self.prescription_ids = self.prescription_ids[keep]
+        self.names = self.names[keep]
+        self.starts = self.starts[keep]
+        self.ends = self.ends[keep]
+        self.daily = self.daily[keep]
+
+    def daily_doses(self, window_start: date, days: int) -> np.ndarray:
+        zeros = np.zeros(len(self), dtype=np.int64)
+        return dose_matrix(zeros, self.starts, self.ends, self.daily, 1, window_start, days)[0]
+
+    def overlapping_medicines(self, window_start: date, days: int) -> np.ndarray:
+        zeros = np.zeros(len(self), dtype=np.int64)
+        ones = np.ones(len(self), dtype=np.int16)
+        return dose_matrix(zeros, self.starts, self.ends, ones, 1, window_start, days)[0]
+
+    def medicine_matrix(self, window_start: date, days: int) -> np.ndarray:
+        """
+        (n_medicines, days) array of doses per medicine per day.
+        """
+        day = np.arange(window_start.toordinal(), window_start.toordinal() + days)
+        active = (day >= self.starts[:, None]) & (day < self.ends[:, None])
+        return active * self.daily[:, None]
+
+    def summary(self, today: date, days: int = 30, ending_within: int = 3) -> dict:
+        """
+        Dose load over the next `days` days (days >= 1) and courses ending within `ending_within` days.
+        """
+        doses = self.daily_doses(today, days)
+        overlap = self.overlapping_medicines(today, days)
+
+        today_ord = today.toordinal()
+        days_left = self.ends.astype(np.int64) - today_ord
+        ending = np.nonzero((self.starts <= today_ord) & (days_left > 0) & (days_left <= ending_within))[0]
+
+        return {
+            "window_start": today.isoformat(),
+            "days": days,
+            "doses_per_day": doses.tolist(),
+            "doses_today": int(doses[0]),
+            "avg_daily_doses": round(float(doses.mean()), 2),
+            "max_daily_doses": int(doses.max()),
+            "active_medicines_today": int(overlap[0]),
+            "max_overlapping_medicines": int(overlap.max()),
+            "courses_ending_soon": [
+                {
+                    "name": self.names[i],
+                    "prescription_id": self.prescription_ids[i],
+                    "end_date": date.fromordinal(int(self.ends[i]) - 1).isoformat(),
+                    "days_left": int(days_left[i]),
+                }
+                for i in ending
+            ],
+        }
+
+
+class ScheduleCache(UserCache):
+    """
+    Per-process cache of DoseSchedules keyed by user id.
+    Upload/delete routes update this worker's schedule in place instead of invalidating it;
+    other workers see the change stamp and reload.
+    """
+    def __init__(self, ttl: float = SCHEDULE_CACHE_TTL, max_users: int = SCHEDULE_CACHE_MAX_USERS, store=None):
+        super().__init__("schedule", ttl, max_users, store)
+
+    def get(self, user_id: str, loader) -> DoseSchedule:
+        """
+        Cached schedule for the user, or one built from `loader()` (a list of prescription rows).
+        """
+        return super().get(user_id, lambda: DoseSchedule.from_prescriptions(loader()))
+
+    def add_prescription(self, user_id: str, prescription: dict):
+        self.changed(user_id, lambda schedule: schedule.add_prescription(prescription))
+
+    def remove_prescription(self, user_id: str, prescription_id: str):
+        self.changed(user_id, lambda schedule: schedule.remove_prescription(prescription_id))
+
+
+dose_schedules = ScheduleCache()
@@ -0,0 +1,20 @@
+import os
+from fastapi.middleware.gzip import GZipMiddleware
+
+try:
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+# Responses below this size are sent uncompressed (not worth the CPU).
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+
+
+def add_compression(app, minimum_size: int = COMPRESSION_MIN_SIZE):
+    """
+    Brotli when the client accepts it (falls back to gzip), plain gzip if brotli-asgi is not installed.
+    """
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=minimum_size, gzip_fallback=True)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=minimum_size)
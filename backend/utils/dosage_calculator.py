@@ -1,31 +1,42 @@
 from datetime import datetime, time, timedelta
 
-def calculate_duration(quantity: int, pattern: str) -> int:
+def get_daily_count(pattern: str) -> int:
     """
-    Calculate duration in days based on quantity and dosage pattern (e.g., '1-0-1').
+    Number of doses per day for a dosage pattern (e.g., '1-0-1' -> 2, 'TDS' -> 3).
+    Returns 0 for unknown patterns.
     """
-    if not pattern or not quantity:
+    if not pattern:
         return 0
     
     try:
         # Check for standard patterns
-        daily_count = 0
         pattern = pattern.strip().upper()
         
         if pattern == 'OD':
-            daily_count = 1
+            return 1
         elif pattern == 'BD' or pattern == 'BID':
-            daily_count = 2
+            return 2
         elif pattern == 'TDS' or pattern == 'TID':
-            daily_count = 3
+            return 3
         elif pattern == 'QID':
-            daily_count = 4
+            return 4
         elif '-' in pattern:
             parts = pattern.split('-')
-            daily_count = sum(int(p) for p in parts if p.isdigit())
+            return sum(int(p) for p in parts if p.isdigit())
         else:
             return 0 # Unknown pattern
-            
+    except:
+        return 0
+
+def calculate_duration(quantity: int, pattern: str) -> int:
+    """
+    Calculate duration in days based on quantity and dosage pattern (e.g., '1-0-1').
+    """
+    if not pattern or not quantity:
+        return 0
+    
+    try:
+        daily_count = get_daily_count(pattern)
         if daily_count == 0:
             return 0
             
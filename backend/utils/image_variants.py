@@ -0,0 +1,139 @@
+import hashlib
+import io
+import logging
+import os
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+BUCKET = "prescriptions"
+# name -> longest edge in px. All variants are WebP.
+VARIANTS = {
+    "thumb": 320,
+    "medium": 1024,
+}
+WEBP_QUALITY = 80
+# Objects are content-addressed, so they never change under the same name.
+# Storage sends this as `Cache-Control: max-age=<value>`, so the directive rides along.
+CACHE_CONTROL = "31536000, immutable"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def public_url(path: str) -> str:
+    project_url = os.environ.get("SUPABASE_URL")
+    return f"{project_url}/storage/v1/object/public/{BUCKET}/{path}"
+
+
+def storage_path_from_url(url: str):
+    """
+    Reverse of `public_url`. Returns None for URLs outside our bucket (e.g. placeholders).
+    """
+    marker = f"/storage/v1/object/public/{BUCKET}/"
+    if not url or marker not in url:
+        return None
+    return url.split(marker, 1)[1]
+
+
+def generate_variants(content: bytes) -> dict:
+    """
+    Resize the original image into each variant and encode it as WebP.
+    Returns {variant_name: webp_bytes}. CPU-bound: call from a worker thread.
+    """
+    image = Image.open(io.BytesIO(content))
+    # Phone photos carry their rotation in EXIF; bake it in before resizing.
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGB")
+
+    variants = {}
+    for name, max_edge in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        buf = io.BytesIO()
+        resized.save(buf, format="WEBP", quality=WEBP_QUALITY, method=4)
+        variants[name] = buf.getvalue()
+    return variants
+
+
+def upload_object(client, path: str, data: bytes, content_type: str):
+    client.storage.from_(BUCKET).upload(
+        path,
+        data,
+        {"content-type": content_type, "cache-control": CACHE_CONTROL, "upsert": "true"},
+    )
+
+
+def upload_variants(client, user_id: str, digest: str, variants: dict) -> dict:
+    """
+    Upload generated variants as `{user_id}/{digest}_{variant}.webp`
+    next to the original. Returns {variant_name: public_url}.
+    """
+    urls = {}
+    for name, data in variants.items():
+        path = f"{user_id}/{digest}_{name}.webp"
+        upload_object(client, path, data, "image/webp")
+        urls[name] = public_url(path)
+    return urls
+
+
+def store_variants(client, user_id: str, digest: str, content: bytes) -> dict:
+    """
+    Generate and upload every variant. Returns {variant_name: public_url}.
+    """
+    return upload_variants(client, user_id, digest, generate_variants(content))
+
+
+def backfill_candidates(prescriptions: list, limit: int) -> list:
+    """
+    Up to `limit` prescriptions still missing variants whose original is in our bucket.
+    Placeholders and external URLs are skipped so they cannot crowd out real uploads.
+    """
+    candidates = []
+    for pres in prescriptions:
+        if len(candidates) >= limit:
+            break
+        if not pres.get("thumbnail_url") and storage_path_from_url(pres.get("image_url")):
+            candidates.append(pres)
+    return candidates
+
+
+def backfill_variants(client, prescriptions: list):
+    """
+    Lazily create variants for prescriptions uploaded before they existed.
+    Meant to run as a background task after the list response is sent.
+
+    Originals that cannot be decoded (e.g. HEIC without a plugin) get their variant
+    columns pointed at the original, so they are not downloaded again on every list.
+    Storage/DB errors are left for a later request to retry.
+    """
+    for pres in prescriptions:
+        path = storage_path_from_url(pres.get("image_url"))
+        if not path:
+            continue
+        try:
+            content = client.storage.from_(BUCKET).download(path)
+        except Exception as e:
+            logger.warning(f"Variant backfill: download failed for prescription {pres.get('id')}: {e}")
+            continue
+
+        try:
+            variants = generate_variants(content)
+        except Exception as e:
+            logger.warning(f"Variant backfill: cannot decode image of prescription {pres.get('id')}, using the original: {e}")
+            update = {"thumbnail_url": pres["image_url"], "medium_url": pres["image_url"]}
+        else:
+            try:
+                user_id = path.split("/", 1)[0]
+                urls = upload_variants(client, user_id, content_hash(content), variants)
+            except Exception as e:
+                logger.warning(f"Variant backfill: upload failed for prescription {pres.get('id')}: {e}")
+                continue
+            update = {"thumbnail_url": urls["thumb"], "medium_url": urls["medium"]}
+
+        try:
+            client.table("prescriptions").update(update).eq("id", pres["id"]).execute()
+        except Exception as e:
+            logger.warning(f"Variant backfill: saving variant URLs failed for prescription {pres.get('id')}: {e}")
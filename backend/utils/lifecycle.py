@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# uvicorn release whose private shutdown internals install_drain_hook() and
+# server.stop_workers_together() replace. Other versions are refused rather than
+# risking a silently broken drain; re-check both patches when upgrading.
+PATCHED_UVICORN_VERSION = "0.27."
+
+# Seconds between SIGTERM and uvicorn closing its sockets. /readyz fails during this
+# window so the load balancer stops routing here before connections are refused.
+# Total shutdown time is this plus GRACEFUL_SHUTDOWN_TIMEOUT (see server.py); keep the
+# sum below the platform's kill grace period (30s on Render and Kubernetes by default).
+READINESS_DRAIN_DELAY = float(os.environ.get("READINESS_DRAIN_DELAY", 5))
+
+
+class InFlightCounter:
+    """
+    Counts calls in progress. Used from worker threads, so guarded by a lock.
+    """
+    def __init__(self):
+        self._count = 0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self._count += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._count -= 1
+
+
+class LifecycleState:
+    def __init__(self):
+        self.started_at = time.time()
+        self.draining = False
+
+
+gemini_calls = InFlightCounter()
+lifecycle = LifecycleState()
+
+
+def check_uvicorn_internals(obj, *attributes):
+    """
+    Raise RuntimeError unless uvicorn is the patched release and `obj` has `attributes`.
+    """
+    import uvicorn
+
+    if not uvicorn.__version__.startswith(PATCHED_UVICORN_VERSION):
+        raise RuntimeError(
+            f"uvicorn {uvicorn.__version__} is installed, but the shutdown patches in utils/lifecycle.py "
+            f"and server.py were written for {PATCHED_UVICORN_VERSION}x; re-check them before upgrading"
+        )
+    missing = [name for name in attributes if not hasattr(obj, name)]
+    if missing:
+        raise RuntimeError(f"uvicorn internals changed: {obj.__name__} has no {', '.join(missing)}")
+
+
+def install_drain_hook(delay: float = READINESS_DRAIN_DELAY):
+    """
+    Mark the worker as draining as soon as uvicorn receives SIGTERM/SIGINT, and hold
+    uvicorn's own shutdown back for `delay` seconds so readiness probes see it first.
+    uvicorn then stops accepting connections and waits for in-flight requests
+    (including Gemini calls) up to its graceful shutdown timeout.
+    A second signal skips the rest of the delay.
+
+    Patches `uvicorn.Server.handle_exit`, which uvicorn registers as the signal handler
+    after importing the app, so this must run at import time of the app module.
+    """
+    import inspect
+    import uvicorn
+
+    check_uvicorn_internals(uvicorn.Server, "handle_exit", "install_signal_handlers")
+    if list(inspect.signature(uvicorn.Server.handle_exit).parameters) != ["self", "sig", "frame"]:
+        raise RuntimeError("uvicorn internals changed: Server.handle_exit(self, sig, frame) expected")
+
+    original = uvicorn.Server.handle_exit
+    if getattr(original, "drain_hook", False):
+        return
+
+    def handle_exit(server, sig, frame):
+        if lifecycle.draining or delay <= 0:
+            lifecycle.draining = True
+            return original(server, sig, frame)
+        lifecycle.draining = True
+        logger.info(
+            f"Received signal {sig}: draining for {delay:g}s "
+            f"({gemini_calls.count} Gemini call(s) in flight)"
+        )
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return original(server, sig, frame)
+
+        def shut_down():
+            if not server.should_exit:
+                original(server, sig, frame)
+
+        loop.call_later(delay, shut_down)
+
+    handle_exit.drain_hook = True
+    handle_exit.original = original
+    uvicorn.Server.handle_exit = handle_exit
@@ -0,0 +1,315 @@
+import ipaddress
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+# Limits are written as "<count>/<period>", e.g. "10/minute".
+RATE_LIMIT_USER = os.environ.get("RATE_LIMIT_USER", "10/minute")
+RATE_LIMIT_IP = os.environ.get("RATE_LIMIT_IP", "30/minute")
+# Daily calls to the model-backed endpoints, per plan: "plan:count,plan:count".
+PLAN_DAILY_QUOTAS = os.environ.get("PLAN_DAILY_QUOTAS", "free:50,pro:500")
+# "memory" (single worker) or "sqlite:/path/to/file.db" (shared by all workers on one host).
+RATE_LIMIT_STORE = os.environ.get("RATE_LIMIT_STORE") or "memory"
+# Proxies allowed to report the client address in X-Forwarded-For. Defaults to loopback
+# and private ranges, where Render's (and most platforms') load balancers connect from.
+TRUSTED_PROXIES = os.environ.get(
+    "TRUSTED_PROXIES", "127.0.0.0/8,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,::1/128,fc00::/7"
+)
+
+_now = time.time
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_limit(value: str):
+    """
+    Parse "10/minute" into (10, 60.0).
+    """
+    count, _, period = value.partition("/")
+    return int(count), float(PERIODS[period.strip().lower()])
+
+
+def parse_quotas(value: str) -> dict:
+    quotas = {}
+    for item in value.split(","):
+        if ":" in item:
+            plan, count = item.split(":", 1)
+            quotas[plan.strip()] = int(count)
+    return quotas
+
+
+_trusted_networks = [ipaddress.ip_network(c.strip()) for c in TRUSTED_PROXIES.split(",") if c.strip()]
+
+
+def is_trusted_proxy(ip: str) -> bool:
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(addr in net for net in _trusted_networks)
+
+
+def client_ip(peer: str, forwarded_for: str = None) -> str:
+    """
+    Address to rate limit on. X-Forwarded-For is only honoured when the direct peer is a
+    trusted proxy, and then read right to left: the right-most hop that is not a trusted
+    proxy was added by our own proxy, while everything to its left is client-supplied.
+    """
+    if not peer:
+        return "unknown"
+    if not forwarded_for or not is_trusted_proxy(peer):
+        return peer
+    hops = [h.strip() for h in forwarded_for.split(",") if h.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+# Limiter results are plain tuples (cheaper to build than objects on the hot path):
+# (allowed, limit, remaining, reset_after, retry_after), times in seconds.
+ALLOWED, LIMIT, REMAINING, RESET_AFTER, RETRY_AFTER = range(5)
+
+
+def rate_limit_headers(result: tuple) -> dict:
+    """
+    RateLimit-* headers (IETF draft) for a limiter result, plus Retry-After when denied.
+    """
+    allowed, limit, remaining, reset_after, retry_after = result
+    headers = {
+        "RateLimit-Limit": str(limit),
+        "RateLimit-Remaining": str(remaining),
+        "RateLimit-Reset": str(int(reset_after + 0.999)),
+    }
+    if not allowed:
+        headers["Retry-After"] = str(int(retry_after + 0.999))
+    return headers
+
+
+# --- Stores ---
+# A store keeps GCRA "theoretical arrival times" (TATs), daily counters, and change
+# stamps that per-process caches use to notice writes made by other workers
+# (see utils/user_cache.py).
+# Each method is one atomic step across everything sharing the store.
+
+class MemoryStore:
+    """
+    Per-process store. Fine for a single worker; each worker gets its own limits otherwise.
+
+    Each map holds at most `max_keys` keys, kept in least-recently-written order: a write
+    moves its key to the end and, once over the cap, the oldest key is dropped (O(1)).
+    A dropped key behaves as never seen, so under key floods limits fail open for the
+    least active clients rather than growing memory.
+    """
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats = OrderedDict()
+        self._counters = OrderedDict()
+        self._stamps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def gcra(self, key: str, now: float, interval: float, tolerance: float):
+        """
+        Advance `key`'s TAT by `interval` unless that would exceed `tolerance`.
+        Returns (allowed, tat): the new TAT if allowed, the current one otherwise.
+        """
+        with self._lock:
+            tats = self._tats
+            tat = tats.get(key, now)
+            if tat < now:
+                tat = now
+            new_tat = tat + interval
+            if now < new_tat - tolerance:
+                return False, tat
+            tats[key] = new_tat
+            tats.move_to_end(key)
+            if len(tats) > self.max_keys:
+                tats.popitem(last=False)
+            return True, new_tat
+
+    def incr(self, key: str, expires_at: float, now: float) -> int:
+        with self._lock:
+            counters = self._counters
+            entry = counters.get(key)
+            if entry is None or entry[1] <= now:
+                entry = [0, expires_at]
+                counters[key] = entry
+            counters.move_to_end(key)
+            if len(counters) > self.max_keys:
+                counters.popitem(last=False)
+            entry[0] += 1
+            return entry[0]
+
+    def touch(self, key: str, now: float, expires_at: float) -> float:
+        """
+        Record a change to `key` at `now`. Returns the previous change time (0.0 if none is live).
+        """
+        with self._lock:
+            stamps = self._stamps
+            previous = stamps.get(key)
+            previous = previous[0] if previous and previous[1] > now else 0.0
+            stamps[key] = (max(previous, now), expires_at)
+            stamps.move_to_end(key)
+            if len(stamps) > self.max_keys:
+                stamps.popitem(last=False)
+            return previous
+
+    def last_touched(self, key: str, now: float) -> float:
+        entry = self._stamps.get(key)
+        return entry[0] if entry and entry[1] > now else 0.0
+
+
+class SQLiteStore:
+    """
+    Store backed by a local SQLite file so every worker process on the host shares limits.
+    Every `cleanup_every` writes (per process), expired rows are deleted from all tables,
+    so the file stays proportional to the keys active within one period/day.
+    """
+    def __init__(self, path: str, cleanup_every: int = 1000):
+        self.cleanup_every = cleanup_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS gcra (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stamps (key TEXT PRIMARY KEY, stamp REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _wrote(self, now: float):
+        # Called inside a write transaction
+        self._writes += 1
+        if self._writes >= self.cleanup_every:
+            self._writes = 0
+            self.delete_expired(now)
+
+    def delete_expired(self, now: float):
+        # A past TAT is equivalent to "never seen"
+        self._conn.execute("DELETE FROM gcra WHERE tat <= ?", (now,))
+        self._conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+        self._conn.execute("DELETE FROM stamps WHERE expires_at <= ?", (now,))
+
+    def gcra(self, key: str, now: float, interval: float, tolerance: float):
+        with self.transaction():
+            row = self._conn.execute("SELECT tat FROM gcra WHERE key = ?", (key,)).fetchone()
+            tat = max(row[0], now) if row else now
+            new_tat = tat + interval
+            if now < new_tat - tolerance:
+                return False, tat
+            self._conn.execute(
+                "INSERT INTO gcra (key, tat) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, new_tat),
+            )
+            self._wrote(now)
+            return True, new_tat
+
+    def incr(self, key: str, expires_at: float, now: float) -> int:
+        with self.transaction():
+            self._conn.execute("DELETE FROM counters WHERE key = ? AND expires_at <= ?", (key, now))
+            self._conn.execute(
+                "INSERT INTO counters (key, value, expires_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + 1",
+                (key, expires_at),
+            )
+            self._wrote(now)
+            return self._conn.execute("SELECT value FROM counters WHERE key = ?", (key,)).fetchone()[0]
+
+    def touch(self, key: str, now: float, expires_at: float) -> float:
+        with self.transaction():
+            row = self._conn.execute(
+                "SELECT stamp FROM stamps WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            previous = row[0] if row else 0.0
+            self._conn.execute(
+                "INSERT INTO stamps (key, stamp, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET stamp = excluded.stamp, expires_at = excluded.expires_at",
+                (key, max(previous, now), expires_at),
+            )
+            self._wrote(now)
+            return previous
+
+    def last_touched(self, key: str, now: float) -> float:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT stamp FROM stamps WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        return row[0] if row else 0.0
+
+
+def create_store(spec: str = RATE_LIMIT_STORE):
+    if spec.startswith("sqlite:"):
+        return SQLiteStore(spec[len("sqlite:"):])
+    return MemoryStore()
+
+
+# --- Limiters ---
+
+class GCRALimiter:
+    """
+    Generic Cell Rate Algorithm: `limit` requests per `period`, bursts of up to `limit`.
+    Stores one float per key.
+    """
+    def __init__(self, store, limit: int, period: float):
+        self.store = store
+        self.limit = limit
+        self.interval = period / limit
+        self.tolerance = period
+        self._gcra = store.gcra
+
+    def hit(self, key: str, now: float = None) -> tuple:
+        if now is None:
+            now = _now()
+        allowed, tat = self._gcra(key, now, self.interval, self.tolerance)
+        if not allowed:
+            return (False, self.limit, 0, tat - now, tat + self.interval - self.tolerance - now)
+        return (True, self.limit, int((now + self.tolerance - tat) / self.interval), tat - now, 0.0)
+
+
+class DailyQuota:
+    """
+    Fixed daily counter per key, reset at midnight UTC.
+    """
+    def __init__(self, store, quotas: dict, default_plan: str = "free"):
+        self.store = store
+        self.quotas = quotas
+        self.default_plan = default_plan
+
+    def hit(self, key: str, plan: str = None, now: float = None) -> tuple:
+        if now is None:
+            now = time.time()
+        plan = plan if plan in self.quotas else self.default_plan
+        limit = self.quotas.get(plan, 0)
+
+        today = datetime.fromtimestamp(now, tz=timezone.utc).date()
+        midnight = datetime.combine(today + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc).timestamp()
+        used = self.store.incr(f"quota:{plan}:{key}:{today.isoformat()}", midnight, now)
+
+        reset_after = midnight - now
+        if used > limit:
+            return (False, limit, 0, reset_after, reset_after)
+        return (True, limit, limit - used, reset_after, 0.0)
+
+
+store = create_store()
+user_limiter = GCRALimiter(store, *parse_limit(RATE_LIMIT_USER))
+ip_limiter = GCRALimiter(store, *parse_limit(RATE_LIMIT_IP))
+daily_quota = DailyQuota(store, parse_quotas(PLAN_DAILY_QUOTAS))
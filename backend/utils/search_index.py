@@ -0,0 +1,158 @@
+import bisect
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+from utils.user_cache import UserCache
+
+# In-process fallback for the `search_prescriptions` Postgres function
+# (see supabase_migration.sql), used when that function is not installed.
+
+SEARCH_INDEX_TTL = 300
+# Indexes kept per worker; least recently used ones are dropped first.
+SEARCH_INDEX_MAX_USERS = 2_000
+# Field weights: a hit on a medicine name matters more than one in its instructions.
+FIELD_WEIGHTS = {"name": 3.0, "doctor_name": 2.0, "purpose": 1.0, "instructions": 1.0}
+PREFIX_FACTOR = 0.8
+FUZZY_FACTOR = 0.5
+FUZZY_MIN_SIMILARITY = 0.4
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text) -> list:
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _parse_datetime(value):
+    if isinstance(value, str) and value:
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if not isinstance(value, datetime):
+        return None
+    # Naive values (e.g. "2025-01-31" from a query string) are treated as UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class PrescriptionSearchIndex:
+    """
+    Inverted index over one user's prescriptions.
+    - postings: token -> {doc index: weight}
+    - vocabulary kept sorted for prefix lookups
+    - trigram -> tokens map for fuzzy (typo-tolerant) lookups
+    """
+    def __init__(self, prescriptions: list):
+        self.docs = prescriptions
+        self.created = [_parse_datetime(p.get("created_at")) for p in prescriptions]
+        self.postings = defaultdict(dict)
+        # (doc index, token) -> medicine names containing that token
+        self.medicine_tokens = defaultdict(set)
+
+        for i, pres in enumerate(prescriptions):
+            for token in tokenize(pres.get("doctor_name")):
+                self._add(token, i, FIELD_WEIGHTS["doctor_name"])
+            for med in pres.get("medicines") or []:
+                for field in ("name", "purpose", "instructions"):
+                    for token in tokenize(med.get(field)):
+                        self._add(token, i, FIELD_WEIGHTS[field])
+                        self.medicine_tokens[(i, token)].add(med.get("name"))
+
+        self.vocabulary = sorted(self.postings)
+        self.trigram_map = defaultdict(set)
+        for token in self.vocabulary:
+            for gram in trigrams(token):
+                self.trigram_map[gram].add(token)
+
+    def _add(self, token: str, doc: int, weight: float):
+        postings = self.postings[token]
+        postings[doc] = postings.get(doc, 0.0) + weight
+
+    def expand(self, term: str) -> dict:
+        """
+        Vocabulary tokens matching `term` exactly, by prefix, or fuzzily, mapped to a score factor.
+        """
+        matches = {}
+        if term in self.postings:
+            matches[term] = 1.0
+
+        i = bisect.bisect_left(self.vocabulary, term)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(term):
+            matches.setdefault(self.vocabulary[i], PREFIX_FACTOR)
+            i += 1
+
+        if len(term) >= 3:
+            grams = trigrams(term)
+            candidates = set()
+            for gram in grams:
+                candidates |= self.trigram_map.get(gram, set())
+            for token in candidates:
+                if token in matches:
+                    continue
+                other = trigrams(token)
+                similarity = len(grams & other) / len(grams | other)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    matches[token] = FUZZY_FACTOR * similarity
+        return matches
+
+    def search(self, query: str, date_from=None, date_to=None, limit: int = 20, offset: int = 0) -> dict:
+        scores = defaultdict(float)
+        matched_terms = defaultdict(set)
+        for term in set(tokenize(query)):
+            for token, factor in self.expand(term).items():
+                for doc, weight in self.postings[token].items():
+                    scores[doc] += weight * factor
+                    matched_terms[doc].add(token)
+
+        date_from = _parse_datetime(date_from)
+        date_to = _parse_datetime(date_to)
+        hits = []
+        for doc, score in scores.items():
+            created = self.created[doc]
+            if created is not None and date_from is not None and created < date_from:
+                continue
+            if created is not None and date_to is not None and created >= date_to:
+                continue
+            hits.append((score, created.timestamp() if created else 0.0, doc))
+        hits.sort(reverse=True)
+
+        results = []
+        for score, _, doc in hits[offset:offset + limit]:
+            pres = self.docs[doc]
+            medicines = set()
+            for token in matched_terms[doc]:
+                medicines |= self.medicine_tokens.get((doc, token), set())
+            results.append({
+                "id": pres.get("id"),
+                "doctor_name": pres.get("doctor_name"),
+                "patient_name": pres.get("patient_name"),
+                "image_url": pres.get("image_url"),
+                "thumbnail_url": pres.get("thumbnail_url"),
+                "created_at": pres.get("created_at"),
+                "matched_medicines": sorted(m for m in medicines if m),
+                "rank": round(score, 4),
+            })
+        return {"total": len(hits), "results": results}
+
+
+class SearchIndexCache(UserCache):
+    """
+    Per-process cache of search indexes keyed by user id.
+    Upload/delete routes invalidate a user's index in every worker (through the shared
+    change stamp); it is rebuilt on the next search.
+    """
+    def __init__(self, ttl: float = SEARCH_INDEX_TTL, max_users: int = SEARCH_INDEX_MAX_USERS, store=None):
+        super().__init__("search", ttl, max_users, store)
+
+    def get(self, user_id: str, loader) -> PrescriptionSearchIndex:
+        return super().get(user_id, lambda: PrescriptionSearchIndex(loader()))
+
+    def invalidate(self, user_id: str):
+        self.changed(user_id)
+
+
+search_indexes = SearchIndexCache()
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """
+    Bounded per-process LRU of objects built from one user's rows, keyed by user id.
+
+    Every worker keeps its own copy, so writes are announced through change stamps in
+    the shared store (`utils.rate_limiter.store`; a SQLite file when several workers run).
+    An entry is rebuilt when its user was changed after it was loaded, by any worker,
+    and in any case after `ttl` seconds.
+    """
+    def __init__(self, namespace: str, ttl: float, max_entries: int, store=None):
+        if store is None:
+            from utils.rate_limiter import store
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.store = store
+        # user_id -> [value, loaded_at, seen_at]: seen_at is the latest change stamp the value reflects
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.namespace}:{user_id}"
+
+    def get(self, user_id: str, build):
+        """
+        Cached value for the user, or a new one from `build()`.
+        """
+        now = time.time()
+        changed_at = self.store.last_touched(self._key(user_id), now)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and now - entry[1] < self.ttl and changed_at <= entry[2]:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+
+        value = build()
+        with self._lock:
+            self._entries[user_id] = [value, now, now]
+            self._entries.move_to_end(user_id)
+            self._evict(now)
+        return value
+
+    def changed(self, user_id: str, update=None):
+        """
+        Record that the user's rows changed. `update(value)` applies the change to this
+        worker's cached value in place; the entry is dropped instead when there is no
+        `update` or another worker changed the user since the value was loaded.
+        """
+        now = time.time()
+        # Stamps only need to outlive the entries they can invalidate
+        previous = self.store.touch(self._key(user_id), now, now + self.ttl)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            if update is None or previous > entry[2] or now - entry[1] >= self.ttl:
+                del self._entries[user_id]
+                return
+            update(entry[0])
+            entry[2] = now
+
+    def _evict(self, now: float):
+        # Oldest-used first: drop while over capacity or expired
+        entries = self._entries
+        while entries:
+            user_id, entry = next(iter(entries.items()))
+            if len(entries) <= self.max_entries and now - entry[1] < self.ttl:
+                break
+            del entries[user_id]
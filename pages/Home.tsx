@@ -23,7 +23,7 @@ const Home: React.FC = () => {
         // Map DB columns to Frontend Types
         const mapped: Prescription[] = data.map((p: any) => ({
           id: p.id,
-          imageUrl: p.image_url,
+          imageUrl: p.thumbnail_url || p.image_url,
           createdAt: p.created_at,
           doctorName: p.doctor_name,
           patientName: p.patient_name,
@@ -36,3 +36,121 @@ create policy "No public access" on public.profiles
 -- alter table public.prescriptions add constraint prescriptions_user_id_fkey foreign key (user_id) references public.profiles(id);
 
 -- IMPORTANT: You must run this SQL in your Supabase Dashboard -> SQL Editor!
+
+-- 5. Login/registration upserts rely on email being unique.
+-- `email text unique` above covers fresh installs; this covers tables created before it.
+create unique index if not exists profiles_email_key on public.profiles(email);
+
+-- 6. Google login in one round-trip.
+-- Inserts a new profile, or on an email conflict only fills google_sub/avatar_url when missing,
+-- and returns the resulting row. Two concurrent first logins for the same email end up with one row.
+create or replace function public.upsert_google_profile(
+  p_id uuid,
+  p_email text,
+  p_full_name text,
+  p_google_sub text,
+  p_avatar_url text
+)
+returns setof public.profiles
+language sql
+as $$
+  insert into public.profiles as p (id, email, full_name, google_sub, avatar_url, created_at)
+  values (p_id, p_email, p_full_name, p_google_sub, p_avatar_url, now())
+  on conflict (email) do update
+    set google_sub = coalesce(p.google_sub, excluded.google_sub),
+        avatar_url = coalesce(p.avatar_url, excluded.avatar_url)
+  returning p.*;
+$$;
+
+-- 7. Plan used for per-user daily quotas on the AI endpoints (see backend/utils/rate_limiter.py).
+alter table public.profiles add column if not exists plan text default 'free';
+
+-- 8. Resized image variants (WebP) stored next to the original in the `prescriptions` bucket.
+alter table public.prescriptions add column if not exists thumbnail_url text;
+alter table public.prescriptions add column if not exists medium_url text;
+
+-- 9. Prescription search (backend GET /search).
+-- Full-text (prefix) matching on medicine name/purpose/instructions plus trigram (typo-tolerant)
+-- matching on medicine and doctor names. The backend falls back to an in-process index if this is missing.
+create extension if not exists pg_trgm;
+
+alter table public.medicines add column if not exists search_tsv tsvector
+  generated always as (
+    to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(purpose, '') || ' ' || coalesce(instructions, ''))
+  ) stored;
+
+create index if not exists medicines_search_tsv_idx on public.medicines using gin (search_tsv);
+create index if not exists medicines_name_trgm_idx on public.medicines using gin (name gin_trgm_ops);
+create index if not exists prescriptions_doctor_name_trgm_idx on public.prescriptions using gin (doctor_name gin_trgm_ops);
+create index if not exists prescriptions_user_created_idx on public.prescriptions (user_id, created_at desc);
+
+-- Returns {"total": <all matches>, "results": [<one page>]}, so the total is known
+-- even for a page past the end. Earlier versions returned a table; drop that first.
+drop function if exists public.search_prescriptions(uuid, text, timestamptz, timestamptz, int, int);
+
+create or replace function public.search_prescriptions(
+  p_user_id uuid,
+  p_query text,
+  p_from timestamptz default null,
+  p_to timestamptz default null,
+  p_limit int default 20,
+  p_offset int default 0
+)
+returns jsonb
+language sql
+stable
+as $$
+  with q as (
+    -- "amoxi clav" -> 'amoxi:* | clav:*'
+    select to_tsquery('simple', nullif(array_to_string(array(
+      select w || ':*'
+      from regexp_split_to_table(regexp_replace(lower(p_query), '[^a-z0-9]+', ' ', 'g'), ' ') as w
+      where w <> ''
+    ), ' | '), '')) as tsq
+  ),
+  user_prescriptions as (
+    select p.*
+    from public.prescriptions p
+    where p.user_id = p_user_id
+      and (p_from is null or p.created_at >= p_from)
+      and (p_to is null or p.created_at < p_to)
+  ),
+  hits as (
+    select m.prescription_id,
+           m.name,
+           coalesce(ts_rank(m.search_tsv, q.tsq), 0) + word_similarity(p_query, m.name) * 3 as score
+    from public.medicines m
+    join user_prescriptions up on up.id = m.prescription_id
+    cross join q
+    where m.search_tsv @@ q.tsq or p_query <% m.name
+    union all
+    select up.id, null, word_similarity(p_query, up.doctor_name) * 2
+    from user_prescriptions up
+    where p_query <% up.doctor_name
+  ),
+  ranked as (
+    select h.prescription_id,
+           array_remove(array_agg(distinct h.name), null) as matched_medicines,
+           sum(h.score)::real as rank
+    from hits h
+    group by h.prescription_id
+  ),
+  matches as (
+    select up.id, up.doctor_name, up.patient_name, up.image_url, up.thumbnail_url, up.created_at,
+           r.matched_medicines, r.rank
+    from ranked r
+    join user_prescriptions up on up.id = r.prescription_id
+  ),
+  page as (
+    select * from matches
+    order by rank desc, created_at desc
+    limit p_limit offset p_offset
+  )
+  select jsonb_build_object(
+    'total', (select count(*) from matches),
+    'results', coalesce(
+      (select jsonb_agg(to_jsonb(page) order by page.rank desc, page.created_at desc) from page),
+      '[]'::jsonb
+    )
+  );
+$$;